@@ -1,5 +1,5 @@
 # flake8: noqa
-__all__ = ['Authors']
+__all__ = ['Authors', 'edit']
 
 from importlib.metadata import version as _version, PackageNotFoundError
 
@@ -9,8 +9,9 @@ except PackageNotFoundError: # package is not installed
     pass
 
 
-from .authors import Authors, _health_check
+from .authors import Authors, _health_check, health_check_report, apply_health_check
 from .authors import (
+    edit,
     register_author, 
     delete_author,
     # 
@@ -1,7 +1,6 @@
-from collections import Counter
+from collections import defaultdict
 import os
-from typing import List, Literal, Tuple, Union
-from yaml import safe_load as load, safe_dump as dump
+from typing import Dict, List, Literal, TextIO, Tuple, Union
 # import pyperclip
 
 from .utils import (
@@ -11,10 +10,15 @@ from .utils import (
     name_to_first_last,
     strip_accents,
     tex_deescape,
-    humanize_yaml,
+    tex_deescape_many,
     closest_author,
+    TrigramIndex,
 )
 
+from .database import get_database, copy_known_authors
+from .model import AffiliationModel, IncidenceMatrix
+from .ordering import alphabetical_order, collation_key
+from .latex_pdf_utils import preview_many
 from .journals.AandA import AandA
 from .journals.MNRAS import MNRAS
 
@@ -26,64 +30,122 @@ def _duplicates(lst):
 
 
 class Names:
-    def __init__(self, names: List[str], nicknames: List[str] = [],
+    def __init__(self, names: List[str],
+                 nicknames: Union[List[str], Dict[str, str]] = [],
                  warnings: bool = False):
         """ Holds a list of names and implements the `in` operator 
         
         Args:
             names (List[str]):
                 List of names
-            nicknames (List[str], optional):
-                List of nicknames.
+            nicknames (List[str] or Dict[str, str], optional):
+                List of nicknames, or dictionary mapping each nickname to the
+                corresponding name in `names`.
             warnings (bool, optional):
                 Whether to print warnings for duplicate names.
+
+        !!! Note
+            All the normalized forms of the names (casefolded, without accents,
+            last names, initials, first and last names) are indexed when the
+            instance is created, so that each `in` test takes constant time.
         """
-        self.names = [name.casefold() for name in names]  # case-insensitive names
+        self.original = list(names)
+        self.names = [name.casefold() for name in self.original]  # case-insensitive names
         self.names_norm = [strip_accents(name) for name in self.names]
         self.nicknames = nicknames
         self._warnings = warnings
-        if warnings and (dup := _duplicates(names))[0]:
+        self._build_index()
+        if warnings and (dup := _duplicates(self.original))[0]:
             print(f"WARNING: duplicate names\n{dup[1]}")
         if warnings and (dup := _duplicates(self.last_names))[0]:
             print(f"WARNING: duplicate last names\n{dup[1]}")
 
+    def _build_index(self):
+        """ Build the lookup tables, mapping each normalized form of the names
+        to the index of the first name that has it """
+        self._last_names = [name_to_last(name) for name in self.names]
+        self._last_names_norm = [name_to_last(name) for name in self.names_norm]
+        self._first_last_names = [name_to_first_last(name) for name in self.names_norm]
+
+        def first_index(keys):
+            index = {}
+            for i, key in enumerate(keys):
+                index.setdefault(key, i)
+            return index
+
+        self._index_names = first_index(self.names)
+        self._index_last = first_index(self._last_names)
+        self._index_names_norm = first_index(self.names_norm)
+        self._index_last_norm = first_index(self._last_names_norm)
+        self._index_first_last = first_index(self._first_last_names)
+
+        if isinstance(self.nicknames, dict):
+            index_original = first_index(self.original)
+            self._index_nicknames = {
+                nickname: index_original.get(name)
+                for nickname, name in self.nicknames.items()
+            }
+        else:
+            self._index_nicknames = dict.fromkeys(self.nicknames)
+
     @property
     def last_names(self):
-        return [name_to_last(name) for name in self.names]
+        return list(self._last_names)
 
     @property
     def last_names_norm(self):
-        return [name_to_last(strip_accents(name)) for name in self.names]
+        return list(self._last_names_norm)
 
     @property
     def first_last_names(self):
-        return [name_to_first_last(strip_accents(name)) for name in self.names]
+        return list(self._first_last_names)
 
     def __len__(self):
         return len(self.names)
 
     def __contains__(self, name: str):
+        return self.resolve(name) is not None
+
+    def resolve(self, name: str) -> Union[Tuple[str, str], None]:
+        """ Find which of the names matches `name`
+
+        Args:
+            name (str):
+                The name to look for
+
+        Returns:
+            match (tuple or None):
+                The matching name (as given when creating the instance) and the
+                rule that matched it, or None if `name` is not known. For
+                nicknames given as a list, the matching name is None.
+        """
         name = name.casefold()
-        if name in self.names or name in self.last_names:
-            return True
-        if name in self.nicknames:
-            return True
-        if (strip_accents(name) in self.names_norm or strip_accents(name) in self.last_names_norm):
-            return True
-        if name_to_last(name) in self.last_names:
-            i = self.last_names.index(name_to_last(name))
+        if (i := self._index_names.get(name)) is not None:
+            return self.original[i], "name"
+        if (i := self._index_last.get(name)) is not None:
+            return self.original[i], "last name"
+        if name in self._index_nicknames:
+            i = self._index_nicknames[name]
+            return (None if i is None else self.original[i]), "nickname"
+        name_norm = strip_accents(name)
+        if (i := self._index_names_norm.get(name_norm)) is not None:
+            return self.original[i], "name (no accents)"
+        if (i := self._index_last_norm.get(name_norm)) is not None:
+            return self.original[i], "last name (no accents)"
+        i = self._index_last.get(name_to_last(name))
+        if i is not None:
             if name_to_initials_last(name) == name_to_initials_last(self.names[i]):
-                return True
-        if name_to_last(strip_accents(name)) in self.last_names_norm:
-            i = self.last_names_norm.index(name_to_last(strip_accents(name)))
+                return self.original[i], "initials and last name"
+        i = self._index_last_norm.get(name_to_last(name_norm))
+        if i is not None:
             if name_to_initials(name) == name_to_initials(self.names[i]):
-                return True
-        if name_to_first_last(name) in self.first_last_names:
-            return True
-        if name_to_first_last(strip_accents(name)) in self.first_last_names:
-            return True
+                return self.original[i], "initials and last name (no accents)"
+        if (i := self._index_first_last.get(name_to_first_last(name))) is not None:
+            return self.original[i], "first and last name"
+        if (i := self._index_first_last.get(name_to_first_last(name_norm))) is not None:
+            return self.original[i], "first and last name (no accents)"
 
-        return False
+        return None
 
 
 def get_all_known_authors(return_filename=False) -> Union[dict, Tuple[dict, str]]:
@@ -99,13 +161,30 @@ def get_all_known_authors(return_filename=False) -> Union[dict, Tuple[dict, str]
             Dictionary with information about the known authors
         file (str):
             Only returned if `return_filename` is True. Path to the yaml file
+
+    !!! Note
+        The database is only parsed once per process (and again if the file
+        changes). This function returns a copy of it, which can be modified.
     """
-    here = os.path.dirname(os.path.abspath(__file__))
-    file = os.path.join(here, "data", "all_known_authors.yml")
+    database = get_database()
+    known_authors = copy_known_authors(database.data)
     if return_filename:
-        return load(open(file, encoding="utf-8")), file
+        return known_authors, database.filename
     else:
-        return load(open(file, encoding="utf-8"))
+        return known_authors
+
+
+def author_index() -> TrigramIndex:
+    """
+    Get the trigram index of the names of all known authors, which is built
+    once and kept until the database changes
+
+    Returns:
+        index (TrigramIndex):
+            Index which can be passed to `utils.closest_author`, or searched
+            directly with `index.search(name, k)`
+    """
+    return get_database().derived("trigram_index", TrigramIndex)
 
 
 def write_all_known_authors(data: dict, confirm: bool = True):
@@ -128,22 +207,15 @@ def write_all_known_authors(data: dict, confirm: bool = True):
     if len(data) == 0:
         raise ValueError("data is empty")
 
-    _, filename = get_all_known_authors(return_filename=True)
+    database = get_database()
 
-    if confirm:
-        print(f"Overwrite {filename}? [y/N]", end=" ")
-        if input().lower() != "y":
-            print("Not overwriting")
-            return
+    if confirm and not _confirm_overwrite(database.filename):
+        return
 
-    with open(filename, "w", encoding="utf-8") as stream:
-        dump(data, stream, allow_unicode=True, width=500, line_break=True)
-    humanize_yaml(filename)
+    database.save(copy_known_authors(data))
 
 
-def get_all_affiliations():
-    """Get a list of all known affiliations"""
-    all_known_authors = get_all_known_authors()
+def _affiliations(all_known_authors: dict) -> List[str]:
     affiliations = []
     for a in all_known_authors.values():
         for aff in a["affiliations"]:
@@ -154,9 +226,7 @@ def get_all_affiliations():
     return affiliations
 
 
-def get_all_affiliations_with_label():
-    """Get a dictionary of all known affiliations that have a label"""
-    all_known_authors = get_all_known_authors()
+def _affiliations_with_label(all_known_authors: dict) -> Dict[str, str]:
     aff_label = {}
     for a in all_known_authors.values():
         for aff in a["affiliations"]:
@@ -166,6 +236,333 @@ def get_all_affiliations_with_label():
     return aff_label
 
 
+def get_all_affiliations():
+    """Get a list of all known affiliations"""
+    return _affiliations(get_database().data)
+
+
+def get_all_affiliations_with_label():
+    """Get a dictionary of all known affiliations that have a label"""
+    return _affiliations_with_label(get_database().data)
+
+
+def _confirm_overwrite(filename: str) -> bool:
+    print(f"Overwrite {filename}? [y/N]", end=" ")
+    if input().lower() != "y":
+        print("Not overwriting")
+        return False
+    return True
+
+
+def _validate_known_authors(data: dict):
+    """Check the structure of the dictionary of known authors
+
+    Raises:
+        ValueError:
+            If `data` is empty or some author has invalid information
+    """
+    if len(data) == 0:
+        raise ValueError("data is empty")
+    for name, info in data.items():
+        if not isinstance(name, str) or name == "":
+            raise ValueError(f"invalid author name: {name!r}")
+        if not isinstance(info, dict) or not isinstance(info.get("affiliations"), list):
+            raise ValueError(f'author "{name}" has no list of affiliations')
+        for aff in info["affiliations"]:
+            if isinstance(aff, str):
+                continue
+            if (isinstance(aff, dict) and len(aff) == 1
+                    and isinstance(list(aff.values())[0], dict)
+                    and "label" in list(aff.values())[0]):
+                continue
+            raise ValueError(f'author "{name}" has an invalid affiliation: {aff!r}')
+
+
+class DatabaseTransaction:
+    """Apply several changes to the database of known authors at once
+
+    The changes are made to an in-memory copy of the database, which is
+    validated and written to disk only once, when the `with` block exits
+    without errors. If an exception is raised inside the block, all the changes
+    are discarded. Use it through the `edit` function.
+
+    Examples:
+        >>> with edit() as db:
+        ...     db.register_author('First Author', ['Some institute'])
+        ...     db.update_author_email('Second Author', 'second@author.com')
+    """
+
+    def __init__(self, confirm: bool = False):
+        """
+        Args:
+            confirm (bool, optional):
+                Whether to ask for confirmation before overwriting the database
+        """
+        self.confirm = confirm
+        self.data = None
+        self.changed = set()
+        self._aff_label = None
+        self._label_aff = None
+        self._index = None
+
+    def __enter__(self):
+        self.data = copy_known_authors(get_database().data)
+        self.changed = set()
+        self._index = None
+        self._invalidate()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._write()
+        finally:
+            self.data = None
+            self._index = None
+            self._invalidate()
+        return False
+
+    def _invalidate(self):
+        self._aff_label = None
+        self._label_aff = None
+
+    def _labels(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        if self._aff_label is None:
+            self._aff_label = _affiliations_with_label(self.data)
+            self._label_aff = {v: k for k, v in self._aff_label.items()}
+        return self._aff_label, self._label_aff
+
+    def _changed(self, *names: str, labels: bool = True):
+        self.changed.update(names)
+        self._index = None
+        if labels:
+            self._invalidate()
+
+    def _closest(self, name: str, allow_closest: bool) -> str:
+        if allow_closest and name not in self.data:
+            if self._index is None:
+                if self.changed:
+                    self._index = TrigramIndex(self.data)
+                else:
+                    self._index = author_index()
+            closest = closest_author(name, self._index)[0]
+            print(f"author '{name}' not found, using closest match '{closest}'")
+            return closest
+        return name
+
+    def _write(self) -> bool:
+        if not self.changed:
+            return False
+        _validate_known_authors(self.data)
+        database = get_database()
+        if self.confirm and not _confirm_overwrite(database.filename):
+            return False
+        # the database now owns self.data
+        database.save(self.data, self.changed)
+        self.changed = set()
+        return True
+
+    def commit(self):
+        """ Validate the changes so far and write them to disk, if there are
+        any, without leaving the `with` block """
+        if self.data is None:
+            raise RuntimeError("the transaction is not active")
+        data = self.data
+        if self._write():
+            self.data = copy_known_authors(data)
+
+    def register_author(
+        self,
+        full_name: str,
+        affiliations: List[str],
+        labels: List[str] = None,
+        email: str = None,
+        orcid: str = None,
+        acknowledgements: str = None,
+        nickname: str = None,
+        spelling: str = None,
+    ):
+        """Register a new author (see `register_author`)"""
+        full_name = tex_deescape(str(full_name))
+        all_known_authors = self.data
+        _, label_aff = self._labels()
+
+        if full_name in all_known_authors:
+            print(f'author "{full_name}" is already known')
+            return
+
+        all_known_authors[full_name] = {"email": email, "orcid": orcid, "affiliations": []}
+
+        if email is None:
+            all_known_authors[full_name].pop("email")
+
+        if orcid is None:
+            all_known_authors[full_name].pop("orcid")
+
+        if labels is None:
+            labels = len(affiliations) * [None]
+
+        labels_changed = False
+        affiliations = tex_deescape_many(str(aff) for aff in affiliations)
+        for aff, label in zip(affiliations, labels):
+            if aff in label_aff:  # provided label instead of affiliation
+                aff_label = {label_aff[aff]: {"label": aff}}
+                all_known_authors[full_name]["affiliations"].append(aff_label)
+                labels_changed |= self._aff_label[label_aff[aff]] != aff
+            elif label is None:
+                all_known_authors[full_name]["affiliations"].append(aff)
+            else:
+                aff_label = {aff: {"label": label}}
+                all_known_authors[full_name]["affiliations"].append(aff_label)
+                labels_changed |= self._aff_label.get(aff) != label
+
+        if acknowledgements is not None:
+            all_known_authors[full_name]["acknowledgements"] = acknowledgements
+
+        if nickname is not None:
+            all_known_authors[full_name]["nickname"] = nickname
+
+        if spelling is not None:
+            all_known_authors[full_name]["spelling"] = spelling
+
+        self._changed(full_name, labels=labels_changed)
+
+    def update_author_name(self, old_name: str, new_name: str, allow_closest: bool = False):
+        """Update the name of one author (see `update_author_name`)"""
+        old_name = self._closest(old_name, allow_closest)
+        if old_name in self.data:
+            new_name = tex_deescape(str(new_name))
+            self.data[new_name] = self.data.pop(old_name)
+            self._changed(old_name, new_name, labels=False)
+            print("updated name for", old_name)
+        else:
+            print(f'author "{old_name}" not found')
+
+    def update_author_email(self, name: str, email: str, allow_closest: bool = False):
+        """Update the email of an author (see `update_author_email`)"""
+        name = self._closest(name, allow_closest)
+        if name in self.data:
+            self.data[name]["email"] = str(email)
+            self._changed(name, labels=False)
+            print("updated email for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def update_author_orcid(self, name: str, orcid: str, allow_closest: bool = False):
+        """Update the ORCID of an author (see `update_author_orcid`)"""
+        name = self._closest(name, allow_closest)
+        if name in self.data:
+            self.data[name]["orcid"] = str(orcid)
+            self._changed(name, labels=False)
+            print("updated ORCID for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def update_author_affiliations(
+        self, name: str, affiliations: List[str], strategy: Literal["merge", "replace"] = "merge"
+    ):
+        """Update the affiliations of an author (see `update_author_affiliations`)"""
+        if isinstance(affiliations, str):
+            affiliations = [affiliations]
+
+        if name in self.data:
+            if strategy == "merge":
+                existing = self.data[name]["affiliations"]
+                new = affiliations + existing
+                self.data[name]["affiliations"] = new
+            elif strategy == "replace":
+                self.data[name]["affiliations"] = affiliations
+
+            self._changed(name)
+            print("updated affiliations for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def update_author_acknowledgements(self, name: str, acknowledgements: str):
+        """Update the acknowledgements of an author (see `update_author_acknowledgements`)"""
+        if name in self.data:
+            self.data[name]["acknowledgements"] = str(acknowledgements)
+            self._changed(name, labels=False)
+            print("updated acknowledgements for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def update_author_nickname(self, name: str, nickname: str):
+        """Update the nickname of an author (see `update_author_nickname`)"""
+        if name in self.data:
+            self.data[name]["nickname"] = str(nickname)
+            self._changed(name, labels=False)
+            print("updated nickname for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def update_author_spelling(self, name: str, spelling: str):
+        """Update the spelling of an author's name (see `update_author_spelling`)"""
+        if name in self.data:
+            self.data[name]["spelling"] = str(spelling)
+            self._changed(name, labels=False)
+            print("updated spelling for", name)
+        else:
+            print(f'author "{name}" not found')
+
+    def delete_author(self, name: str):
+        """Remove an author from the known author list (see `delete_author`)"""
+        if name in self.data:
+            self.data.pop(name)
+            self._changed(name)
+            print(f'removed author "{name}"')
+        else:
+            print(f'author "{name}" not found')
+
+    def change_affiliation(self, old: str, new: str):
+        """Change an affiliation (see `change_affiliation`)"""
+        for k, v in self.data.items():
+            affs = v["affiliations"]
+            for i, aff in enumerate(affs):
+                if old in aff:
+                    print(k, aff, type(aff))
+                    if isinstance(aff, str):
+                        v["affiliations"][i] = new
+                    elif isinstance(aff, dict):
+                        v["affiliations"][i][new] = aff[old]
+                        v["affiliations"][i].pop(old)
+                    self._changed(k)
+
+    def set_affiliation_label(self, affiliation: str, label: str):
+        """Set the label for a given affiliation (see `set_affiliation_label`)"""
+        for k, v in self.data.items():
+            if affiliation in v["affiliations"]:
+                aff = []
+                for a in v["affiliations"]:
+                    if a == affiliation:
+                        aff.append({affiliation: {"label": str(label)}})
+                    else:
+                        aff.append(a)
+                self.data[k]["affiliations"] = aff
+                self._changed(k)
+
+
+def edit(confirm: bool = False) -> DatabaseTransaction:
+    """Edit the database of known authors in a single transaction
+
+    Any number of changes can be made inside a `with` block. They are written
+    to disk only once, at the end of the block, or discarded if an exception
+    is raised inside it.
+
+    Args:
+        confirm (bool, optional):
+            Whether to ask for confirmation before overwriting the database
+
+    Examples:
+        >>> import authors
+        >>> with authors.edit() as db:
+        ...     db.register_author('First Author', ['Some institute'])
+        ...     db.update_author_orcid('First Author', '0000-0000-0000-0000')
+        ...     db.delete_author('Old Author')
+    """
+    return DatabaseTransaction(confirm=confirm)
+
+
 def register_author(
     full_name: str,
     affiliations: List[str],
@@ -196,46 +593,11 @@ def register_author(
         spelling (str, optional):
             Exact spelling of the author's name.
     """
-    full_name = tex_deescape(str(full_name))
-    all_known_authors = get_all_known_authors()
-    label_aff = {v: k for k, v in get_all_affiliations_with_label().items()}
-
-    if full_name in all_known_authors:
-        print(f'author "{full_name}" is already known')
-        return
-
-    all_known_authors[full_name] = {"email": email, "orcid": orcid, "affiliations": []}
-
-    if email is None:
-        all_known_authors[full_name].pop("email")
-
-    if orcid is None:
-        all_known_authors[full_name].pop("orcid")
-
-    if labels is None:
-        labels = len(affiliations) * [None]
-
-    for aff, label in zip(affiliations, labels):
-        aff = tex_deescape(str(aff))
-        if aff in label_aff:  # provided label instead of affiliation
-            aff_label = {label_aff[aff]: {"label": aff}}
-            all_known_authors[full_name]["affiliations"].append(aff_label)
-        elif label is None:
-            all_known_authors[full_name]["affiliations"].append(aff)
-        else:
-            aff_label = {aff: {"label": label}}
-            all_known_authors[full_name]["affiliations"].append(aff_label)
-
-    if acknowledgements is not None:
-        all_known_authors[full_name]["acknowledgements"] = acknowledgements
-
-    if nickname is not None:
-        all_known_authors[full_name]["nickname"] = nickname
-
-    if spelling is not None:
-        all_known_authors[full_name]["spelling"] = spelling
-
-    write_all_known_authors(all_known_authors, confirm=False)
+    with edit() as db:
+        db.register_author(
+            full_name, affiliations, labels, email, orcid,
+            acknowledgements, nickname, spelling,
+        )
 
 
 def update_author_name(old_name: str, new_name: str, allow_closest: bool = False):
@@ -250,18 +612,8 @@ def update_author_name(old_name: str, new_name: str, allow_closest: bool = False
             If True and `old_name` is not found, try to find the closest match
             in the list of known authors
     """
-    all_known_authors = get_all_known_authors()
-    if allow_closest and old_name not in all_known_authors:
-        closest = closest_author(old_name, list(all_known_authors.keys()))[0]
-        print(f"author '{old_name}' not found, using closest match '{closest}'")
-        old_name = closest
-    if old_name in all_known_authors:
-        new_name = tex_deescape(str(new_name))
-        all_known_authors[new_name] = all_known_authors.pop(old_name)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated name for", old_name)
-    else:
-        print(f'author "{old_name}" not found')
+    with edit() as db:
+        db.update_author_name(old_name, new_name, allow_closest)
 
 
 def update_author_email(name: str, email: str, allow_closest: bool = False):
@@ -276,17 +628,8 @@ def update_author_email(name: str, email: str, allow_closest: bool = False):
             If True and `name` is not found, try to find the closest match
             in the list of known authors
     """
-    all_known_authors = get_all_known_authors()
-    if allow_closest and name not in all_known_authors:
-        closest = closest_author(name, list(all_known_authors.keys()))[0]
-        print(f"author '{name}' not found, using closest match '{closest}'")
-        name = closest
-    if name in all_known_authors:
-        all_known_authors[name]["email"] = str(email)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated email for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_email(name, email, allow_closest)
 
 
 def update_author_orcid(name: str, orcid: str, allow_closest: bool = False):
@@ -301,17 +644,8 @@ def update_author_orcid(name: str, orcid: str, allow_closest: bool = False):
             If True and `name` is not found, try to find the closest match
             in the list of known authors
     """
-    all_known_authors = get_all_known_authors()
-    if allow_closest and name not in all_known_authors:
-        closest = closest_author(name, list(all_known_authors.keys()))[0]
-        print(f"author '{name}' not found, using closest match '{closest}'")
-        name = closest
-    if name in all_known_authors:
-        all_known_authors[name]["orcid"] = str(orcid)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated ORCID for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_orcid(name, orcid, allow_closest)
 
 
 def update_author_affiliations(
@@ -327,22 +661,8 @@ def update_author_affiliations(
             affiliations are added to the existing ones (keeping only unique).
             If 'replace', the existing affiliations are replaced.
     """
-    if isinstance(affiliations, str):
-        affiliations = [affiliations]
-
-    all_known_authors = get_all_known_authors()
-    if name in all_known_authors:
-        if strategy == "merge":
-            existing = all_known_authors[name]["affiliations"]
-            new = affiliations + existing
-            all_known_authors[name]["affiliations"] = new
-        elif strategy == "replace":
-            all_known_authors[name]["affiliations"] = affiliations
-
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated affiliations for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_affiliations(name, affiliations, strategy)
 
 
 def update_author_acknowledgements(name: str, acknowledgements: str):
@@ -352,13 +672,8 @@ def update_author_acknowledgements(name: str, acknowledgements: str):
         name (str): The name of the author
         acknowledgements (str): The new acknowledgements
     """
-    all_known_authors = get_all_known_authors()
-    if name in all_known_authors:
-        all_known_authors[name]["acknowledgements"] = str(acknowledgements)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated acknowledgements for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_acknowledgements(name, acknowledgements)
 
 
 def update_author_nickname(name: str, nickname: str):
@@ -368,13 +683,8 @@ def update_author_nickname(name: str, nickname: str):
         name (str): The name of the author
         nickname (str): The new nickname
     """
-    all_known_authors = get_all_known_authors()
-    if name in all_known_authors:
-        all_known_authors[name]["nickname"] = str(nickname)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated nickname for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_nickname(name, nickname)
 
 
 def update_author_spelling(name: str, spelling: str):
@@ -384,13 +694,8 @@ def update_author_spelling(name: str, spelling: str):
         name (str): The name of the author
         spelling (str): The new spelling
     """
-    all_known_authors = get_all_known_authors()
-    if name in all_known_authors:
-        all_known_authors[name]["spelling"] = str(spelling)
-        write_all_known_authors(all_known_authors, confirm=False)
-        print("updated spelling for", name)
-    else:
-        print(f'author "{name}" not found')
+    with edit() as db:
+        db.update_author_spelling(name, spelling)
 
 
 def delete_author(name: str):
@@ -399,13 +704,8 @@ def delete_author(name: str):
     Args:
         name (str): name of the author to remove
     """
-    all_known_authors = get_all_known_authors()
-    if name in all_known_authors:
-        all_known_authors.pop(name)
-        write_all_known_authors(all_known_authors)
-        print(f'removed author "{name}"')
-    else:
-        print(f'author "{name}" not found')
+    with edit(confirm=True) as db:
+        db.delete_author(name)
 
 
 def change_affiliation(old: str, new: str):
@@ -415,18 +715,8 @@ def change_affiliation(old: str, new: str):
         old (str): old affiliation, which will be replaced
         new (str): new affiliation
     """
-    all_known_authors = get_all_known_authors()
-    for k, v in all_known_authors.items():
-        affs = v["affiliations"]
-        for i, aff in enumerate(affs):
-            if old in aff:
-                print(k, aff, type(aff))
-                if isinstance(aff, str):
-                    v["affiliations"][i] = new
-                elif isinstance(aff, dict):
-                    v["affiliations"][i][new] = aff[old]
-                    v["affiliations"][i].pop(old)
-    write_all_known_authors(all_known_authors)
+    with edit(confirm=True) as db:
+        db.change_affiliation(old, new)
 
 
 def set_affiliation_label(affiliation: str, label: str):
@@ -436,69 +726,173 @@ def set_affiliation_label(affiliation: str, label: str):
         affiliation (str): the affiliation to set the label for
         label (str): the label
     """
-    all_known_authors = get_all_known_authors()
-    for k, v in all_known_authors.items():
-        if affiliation in v["affiliations"]:
-            aff = []
-            for a in v["affiliations"]:
-                if a == affiliation:
-                    aff.append({affiliation: {"label": str(label)}})
-                else:
-                    aff.append(a)
-            all_known_authors[k]["affiliations"] = aff
+    with edit(confirm=True) as db:
+        db.set_affiliation_label(affiliation, label)
 
-    write_all_known_authors(all_known_authors)
 
+def health_check_report(check_affiliations: bool = True, threshold: float = 0.7,
+                        workers: int = None) -> dict:
+    """Check the database of known authors, without changing it
 
-def _health_check(check_affiliations: bool = True):
-    all_known_authors = get_all_known_authors()
-    print(f"there are {len(all_known_authors)} known authors")
-    print("checking for duplicate / similar author names...")
+    Args:
+        check_affiliations (bool, optional):
+            Whether to look for similar affiliations, which is the slowest check
+        threshold (float, optional):
+            Minimum similarity, `1 - 2 * lev_dist(a, b) / (len(a) + len(b))`,
+            for two affiliations to be reported
+        workers (int, optional):
+            Number of processes used to compare affiliations (see
+            `utils.similar_pairs`)
+
+    Returns:
+        report (dict):
+            Dictionary, which can be saved as JSON, with the results:
+
+            - `known_authors`: number of known authors
+            - `affiliations`: number of unique affiliations
+            - `duplicate_names`: authors which have the same initials and last
+              name
+            - `label_normalizations`: affiliations which have a label but
+              appear without it for some authors
+            - `similar_affiliations`: pairs of similar affiliations, each with
+              a `keep` entry which can be set to "first", "second" or "both"
+              before passing the report to `apply_health_check`
+    """
+    from .utils import similar_pairs
+
+    all_known_authors = get_database().data
     names = list(all_known_authors.keys())
-    if len(names) == len(set(names)):
-        print(" no exact duplicates")
 
-    names_initials_last = [name_to_initials_last(name) for name in names]
-    if len(names_initials_last) == len(set(names_initials_last)):
+    by_initials_last = defaultdict(list)
+    for name in names:
+        by_initials_last[name_to_initials_last(name)].append(name)
+    duplicate_names = [
+        {"name": key, "count": len(authors), "authors": authors}
+        for key, authors in by_initials_last.items()
+        if len(authors) > 1
+    ]
+
+    affiliations = sorted(set(_affiliations(all_known_authors)))
+    affiliation_label = _affiliations_with_label(all_known_authors)
+
+    without_label = defaultdict(list)
+    for name, data in all_known_authors.items():
+        for aff in data["affiliations"]:
+            if isinstance(aff, str) and aff in affiliation_label:
+                without_label[aff].append(name)
+    label_normalizations = [
+        {"affiliation": aff, "label": affiliation_label[aff], "authors": authors}
+        for aff, authors in without_label.items()
+    ]
+
+    similar_affiliations = []
+    if check_affiliations:
+        pairs = similar_pairs(affiliations, threshold=threshold, workers=workers)
+        for i, j, dist, prob in pairs:
+            similar_affiliations.append({
+                "first": affiliations[i],
+                "second": affiliations[j],
+                "distance": dist,
+                "similarity": prob,
+                "keep": None,
+            })
+
+    return {
+        "known_authors": len(all_known_authors),
+        "affiliations": len(affiliations),
+        "duplicate_names": duplicate_names,
+        "label_normalizations": label_normalizations,
+        "similar_affiliations": similar_affiliations,
+    }
+
+
+def apply_health_check(report: dict, labels: bool = True, confirm: bool = False):
+    """Apply the fixes in a report from `health_check_report`
+
+    All the changes are written to the database at once.
+
+    Args:
+        report (dict):
+            The report, possibly edited. Pairs of similar affiliations are
+            merged according to their `keep` entry: "first" replaces the second
+            affiliation with the first, "second" does the opposite, and any
+            other value leaves both unchanged.
+        labels (bool, optional):
+            Whether to add the labels in `label_normalizations`
+        confirm (bool, optional):
+            Whether to ask for confirmation before overwriting the database
+    """
+    with edit(confirm=confirm) as db:
+        if labels:
+            for fix in report.get("label_normalizations", []):
+                db.set_affiliation_label(fix["affiliation"], fix["label"])
+        for pair in report.get("similar_affiliations", []):
+            if pair.get("keep") == "first":
+                db.change_affiliation(pair["second"], pair["first"])
+            elif pair.get("keep") == "second":
+                db.change_affiliation(pair["first"], pair["second"])
+
+
+def _health_check(check_affiliations: bool = True, workers: int = None):
+    print("checking for duplicate / similar author names...")
+    report = health_check_report(check_affiliations, workers=workers)
+    print(f"there are {report['known_authors']} known authors")
+
+    if len(report["duplicate_names"]) == 0:
         print(" no duplicates in initials, last name")
     else:
         print(" duplicates in initials, last name:")
-        c = Counter(names_initials_last)
-        for name, counts in c.items():
-            if counts > 1:
-                print("  ", name, "occurs", counts, "times")
+        for duplicate in report["duplicate_names"]:
+            print("  ", duplicate["name"], "occurs", duplicate["count"], "times")
 
-    affiliations = list(set(get_all_affiliations()))
-    affiliation_label = get_all_affiliations_with_label()
-    print(f"there are {len(affiliations)} unique affiliations")
+    print(f"there are {report['affiliations']} unique affiliations")
 
     print("setting affiliation labels...")
-    for i, affiliation in enumerate(affiliations):
-        print(f"progress {i + 1}/{len(affiliations)}", end="\r")
-        if affiliation in affiliation_label:
-            set_affiliation_label(affiliation, affiliation_label[affiliation])
+    apply_health_check({"label_normalizations": report["label_normalizations"]},
+                       confirm=True)
 
     if not check_affiliations:
         return
     print("checking for duplicate / similar affiliations...")
-    from .utils import lev_dist
-
-    for i, affiliation1 in enumerate(affiliations):
-        print(f"progress {i + 1}/{len(affiliations)}", end="\r")
-        for j, affiliation2 in enumerate(affiliations[i + 1 :]):
-            dist = lev_dist(affiliation1, affiliation2)
-            prob = 1 - 2 * dist / (len(affiliation1) + len(affiliation2))
-            if prob > 0.7:
-                print(f"{dist=}, {prob=}")
-                print(" " + affiliation1)
-                print(" " + affiliation2)
-                opt = input(" (1) keep first (2) keep second (3) keep both : ")
-                if opt == "1":
-                    change_affiliation(affiliation2, affiliation1)
-                elif opt == "2":
-                    change_affiliation(affiliation1, affiliation2)
-                elif opt == "3":
-                    pass
+
+    for pair in report["similar_affiliations"]:
+        print(f"dist={pair['distance']}, prob={pair['similarity']}")
+        print(" " + pair["first"])
+        print(" " + pair["second"])
+        opt = input(" (1) keep first (2) keep second (3) keep both : ")
+        pair["keep"] = {"1": "first", "2": "second", "3": "both"}.get(opt)
+
+    apply_health_check(report, labels=False, confirm=True)
+
+
+def _nickname_to_name(all_known_authors: dict) -> Dict[str, str]:
+    nicknames = {}
+    for name, data in all_known_authors.items():
+        if "nickname" in data:
+            nicknames.setdefault(data["nickname"], name)
+    return nicknames
+
+
+def _known_names(all_known_authors: dict) -> Names:
+    return Names(
+        all_known_authors.keys(),
+        nicknames=_nickname_to_name(all_known_authors),
+        warnings=False,
+    )
+
+
+# name of the methods for each journal, e.g. AandA and iter_AandA
+JOURNALS = {
+    "aanda": "AandA",
+    "mnras": "MNRAS",
+}
+
+
+def _check_journals(journals: List[str]):
+    unknown = [journal for journal in journals if journal not in JOURNALS]
+    if unknown:
+        raise ValueError(f"unknown journal(s): {', '.join(unknown)}, "
+                         f"choose from {', '.join(JOURNALS)}")
 
 
 class Authors(AandA, MNRAS):
@@ -525,20 +919,10 @@ class Authors(AandA, MNRAS):
         if load_from == "":
             raise ValueError("`load_from` should not be an empty string")
 
-        if load_from == "all":
-            load_from = "\n".join([n for n in get_all_known_authors().keys()])
-
-        self.all_known_authors = get_all_known_authors()
-
-        self.all_known_nicknames = list(
-            set([v.get("nickname", "") for v in self.all_known_authors.values()])
-        )
+        self._set_database(get_database())
 
-        self.names = Names(
-            self.all_known_authors.keys(),
-            nicknames=self.all_known_nicknames,
-            warnings=False,
-        )
+        if load_from == "all":
+            load_from = "\n".join([n for n in self.all_known_authors.keys()])
 
         if os.path.exists(load_from):
             A = list(map(str.strip, open(load_from, encoding="utf-8").readlines()))
@@ -546,10 +930,36 @@ class Authors(AandA, MNRAS):
             assert isinstance(load_from, str)
             A = load_from.splitlines()
 
+        self._set_authors(A, warn_unknown)
+
+    @classmethod
+    def from_list(cls, names: List[str], warn_unknown: bool = True) -> "Authors":
+        """Create from a list of author names
+
+        Unlike `Authors(...)`, the names are never interpreted as a file name.
+
+        Args:
+            names (List[str]):
+                The names of the authors (empty names are ignored)
+            warn_unknown (bool):
+                Whether to emit warninings for unknown authors
+        """
+        names = [name.strip() for name in names]
+        if not any(names):
+            raise ValueError("`names` should have at least one name")
+        authors = cls.__new__(cls)
+        authors._set_database(get_database())
+        authors._set_authors(names, warn_unknown)
+        return authors
+
+    def _set_authors(self, A: List[str], warn_unknown: bool):
         self.all_authors = [a for a in A if a != ""]
-        self.last_names = [name_to_last(a).lower() for a in A]
+        self.last_names = [name_to_last(a).lower() for a in self.all_authors]
         self.first_author = self.all_authors[0]
+        self.warn_unknown = warn_unknown
+        self.resolved = self._resolve_authors(self.all_authors)
         self.known = self._get_known_authors()
+        self._invalidate()
 
         if warn_unknown and not all(self.known):
             print("WARNING: some authors are unknown:", ", ".join(self.unknown_authors))
@@ -561,8 +971,161 @@ class Authors(AandA, MNRAS):
     def unknown_authors(self):
         return [a for a, known in zip(self.all_authors, self.known) if not known]
 
+    def _set_database(self, database):
+        self._database = database
+        self.all_known_authors = database.data
+        self._generation = database.generation
+        self.names = database.derived("names", _known_names)
+        self.all_known_nicknames = list(self.names.nicknames)
+
+    def _check_database(self):
+        """ Resolve the authors again if the database changed since then """
+        database = get_database()
+        database.data  # reloads it, and changes the generation, if the file changed
+        if database is self._database and database.generation == self._generation:
+            return
+        self._set_database(database)
+        self.resolved = self._resolve_authors(self.all_authors)
+        self.known = self._get_known_authors()
+        self._invalidate()
+
+    def _invalidate(self):
+        """ Forget everything derived from the author list """
+        self._models = {}
+
+    def _resolve_author(self, author: str) -> bool:
+        """ Resolve a single author, if needed, and return whether it is known """
+        if author not in self.resolved:
+            match = self.names.resolve(author)
+            if match is not None and match[0] is not None:
+                self.resolved[author] = match
+            elif self.warn_unknown:
+                print("WARNING: author is unknown:", author)
+        return author in self.resolved
+
+    def _position(self, author: Union[str, int]) -> int:
+        """ The position of `author` (a name or an index) in the list """
+        if isinstance(author, int):
+            if not -len(self.all_authors) <= author < len(self.all_authors):
+                raise IndexError(f"there is no author at position {author}")
+            return author % len(self.all_authors)
+        try:
+            return self.all_authors.index(author)
+        except ValueError:
+            raise ValueError(f'author "{author}" is not in the list') from None
+
+    def _forget(self, author: str):
+        """ Forget how `author` was resolved, if it is not in the list anymore """
+        if author not in self.all_authors:
+            self.resolved.pop(author, None)
+
+    def _list_changed(self):
+        self.first_author = self.all_authors[0] if self.all_authors else None
+        self._invalidate()
+
+    def add(self, author: str, position: Union[int, None] = None):
+        """ Add an author to the list
+
+        Args:
+            author (str):
+                The name of the author
+            position (int, optional):
+                Where to insert the author (as in `list.insert`). By default,
+                the author is added at the end.
+        """
+        self._check_database()
+        author = author.strip()
+        if author == "":
+            raise ValueError("`author` should not be an empty string")
+        known = self._resolve_author(author)
+
+        if position is None or position >= len(self.all_authors):
+            self.all_authors.append(author)
+            self.known.append(known)
+            self.last_names.append(name_to_last(author).lower())
+            # authors in the given order can simply be extended
+            model = self._models.get((False,))
+            self._list_changed()
+            if model is not None:
+                model.append(author, known, self.query_author)
+                self._models[(False,)] = model
+        else:
+            self.all_authors.insert(position, author)
+            self.known.insert(position, known)
+            self.last_names.insert(position, name_to_last(author).lower())
+            self._list_changed()
+
+    def remove(self, author: Union[str, int]):
+        """ Remove an author from the list
+
+        Args:
+            author (str or int):
+                The name of the author (the first occurrence is removed) or
+                its position in the list
+        """
+        self._check_database()
+        i = self._position(author)
+        author = self.all_authors.pop(i)
+        self.known.pop(i)
+        self.last_names.pop(i)
+        self._forget(author)
+        self._list_changed()
+
+    def move(self, author: Union[str, int], position: int):
+        """ Move an author to another position in the list
+
+        Args:
+            author (str or int):
+                The name of the author or its position in the list
+            position (int):
+                The new position of the author (as in `list.insert`)
+        """
+        self._check_database()
+        i = self._position(author)
+        for lst in (self.all_authors, self.known, self.last_names):
+            lst.insert(position, lst.pop(i))
+        self._list_changed()
+
+    def replace(self, old: Union[str, int], new: str):
+        """ Replace an author in the list by another one
+
+        Args:
+            old (str or int):
+                The name of the author or its position in the list
+            new (str):
+                The name of the new author
+        """
+        self._check_database()
+        new = new.strip()
+        if new == "":
+            raise ValueError("`new` should not be an empty string")
+        i = self._position(old)
+        old = self.all_authors[i]
+        self.all_authors[i] = new
+        self.known[i] = self._resolve_author(new)
+        self.last_names[i] = name_to_last(new).lower()
+        self._forget(old)
+        self._list_changed()
+
+    def _resolve_authors(self, authors: List[str]) -> Dict[str, Tuple[str, str]]:
+        """ Match each name in `authors` to a known author, only once per name
+
+        Returns:
+            resolved (dict):
+                Dictionary mapping each known name in `authors` to a tuple with
+                the name of the matching known author and the rule that matched
+        """
+        resolved = {}
+        for author in authors:
+            if author in resolved:
+                continue
+            match = self.names.resolve(author)
+            if match is not None and match[0] is not None:
+                resolved[author] = match
+        return resolved
+
     def _get_known_authors(self) -> List:
-        known = [author in self.names for author in self.all_authors]
+        known = [author in self.resolved for author in self.all_authors]
         return known
 
         # known = []
@@ -583,62 +1146,202 @@ class Authors(AandA, MNRAS):
         #         known.append(False)
         # return known
 
+    def author_order(
+        self, alphabetical=False, alphabetical_after=1, alphabetical_groups=None
+    ) -> List[int]:
+        """ The order of the authors in the list (see `AandA` for the arguments)
+
+        Authors are sorted by last name, ignoring case, accents and lowercase
+        particles (see `ordering.collation_key`), using the name in the
+        database for known authors. Authors with the same last name keep their
+        order. `alphabetical_groups` is not modified.
+
+        Returns:
+            The positions of the authors in `all_authors`, in the new order
+        """
+        if not alphabetical:
+            return list(range(len(self.all_authors)))
+        keys = [
+            collation_key(self.resolved[author][0] if known else author)
+            for author, known in zip(self.all_authors, self.known)
+        ]
+        return alphabetical_order(keys, alphabetical_after, alphabetical_groups)
+
     def _get_author_list(
         self, alphabetical=False, alphabetical_after=1, alphabetical_groups=None
     ):
-        if alphabetical:
-            # argsort
-            def argsort(seq):
-                return sorted(range(len(seq)), key=seq.__getitem__)
-
-            if alphabetical_groups is None:
-                # authors which are not in alphabetical order
-                author_list = self.all_authors[:alphabetical_after]
-                known_authors = self.known[:alphabetical_after]
-
-                # authors which are in alphabetical order, sorted
-                sauthors = argsort(self.last_names[alphabetical_after:])
-                for i in sauthors:
-                    author_list.append(self.all_authors[alphabetical_after:][i])
-                    known_authors.append(self.known[alphabetical_after:][i])
-
-            # sort alphabetically in groups (alphabetical_after is ignored)
-            else:
-                alphabetical_groups.append(len(self.all_authors))
-                alphabetical_after = alphabetical_groups[0]
-                # authors which are not in alphabetical order
-                author_list = self.all_authors[:alphabetical_after]
-                known_authors = self.known[:alphabetical_after]
-
-                # authors which are in alphabetical order, sorted
-                for g1, g2 in zip(alphabetical_groups, alphabetical_groups[1:]):
-                    sauthors = argsort(self.last_names[g1:g2])
-                    for i in sauthors:
-                        author_list.append(self.all_authors[g1:][i])
-                        known_authors.append(self.known[g1:][i])
+        if not alphabetical:
+            return self.all_authors, self.known
+        order = self.author_order(alphabetical, alphabetical_after, alphabetical_groups)
+        author_list = [self.all_authors[i] for i in order]
+        known_authors = [self.known[i] for i in order]
+        return author_list, known_authors
+
+    def affiliation_model(
+        self, alphabetical=False, alphabetical_after=1, alphabetical_groups=None
+    ) -> AffiliationModel:
+        """ Get the authors, in order, with their numbered institutes
+
+        The model is built once for each author order (see `AandA` for the
+        arguments) and shared by all the journal renderers. It is built again
+        if the author list or the database change.
+        """
+        self._check_database()
 
+        if not alphabetical:
+            key = (False,)
+        elif alphabetical_groups is None:
+            key = (True, alphabetical_after)
         else:
-            author_list = self.all_authors
-            known_authors = self.known
+            key = (True, tuple(alphabetical_groups))
+
+        if key not in self._models:
+            author_list, known_authors = self._get_author_list(
+                alphabetical, alphabetical_after, alphabetical_groups
+            )
+            self._models[key] = AffiliationModel(
+                author_list, known_authors, self.query_author
+            )
+        return self._models[key]
+
+    def render_all(
+        self,
+        journals: List[str] = ("aanda", "mnras"),
+        alphabetical: bool = False,
+        alphabetical_after: int = 1,
+        alphabetical_groups: Union[List[int], None] = None,
+        force_initials: bool = True,
+        add_orcids: bool = True,
+        add_email: bool = True,
+        line_breaks: int = 6,
+    ) -> Dict[str, str]:
+        r"""Provide the LaTeX tags for several journals at once
+
+        The authors are resolved and the institutes numbered only once, and
+        the result is rendered in the format of each journal.
 
-        return author_list, known_authors
+        Args:
+            journals (List[str], optional):
+                The journals, any of 'aanda' and 'mnras'
+            alphabetical, alphabetical_after, alphabetical_groups:
+                How to sort the authors (see `AandA`)
+            force_initials (bool, optional):
+                If True, force the author names to be F. M. Last
+            add_orcids (bool, optional):
+                Whether to add ORCID links (only for A&A)
+            add_email (bool, optional):
+                Add email address for first author (only for A&A)
+            line_breaks (int, optional):
+                Number of authors in each line (only for MNRAS)
+
+        Returns:
+            texts (dict):
+                Dictionary mapping each journal to its LaTeX tags
+
+        Examples:
+            >>> texts = authors.render_all(["aanda", "mnras"])
+            >>> print(texts["mnras"])
+        """
+        _check_journals(journals)
+
+        model = self.affiliation_model(alphabetical, alphabetical_after, alphabetical_groups)
+        options = {
+            "aanda": dict(add_orcids=add_orcids, add_email=add_email,
+                          force_initials=force_initials),
+            "mnras": dict(line_breaks=line_breaks, force_initials=force_initials),
+        }
+        return {
+            journal: "".join(
+                getattr(self, f"_{JOURNALS[journal]}_chunks")(model, **options[journal])
+            )
+            for journal in journals
+        }
+
+    def preview_all(
+        self,
+        journals: List[str] = ("aanda", "mnras"),
+        max_workers: Union[int, None] = None,
+        timeout: Union[float, None] = None,
+        open_pdf: bool = True,
+        **options,
+    ) -> Dict[str, str]:
+        """Compile the previews for several journals at the same time
+
+        Args:
+            journals (List[str], optional):
+                The journals, any of 'aanda' and 'mnras'
+            max_workers (int, optional):
+                Maximum number of previews compiled at the same time
+            timeout (float, optional):
+                Maximum time to compile each preview, in seconds
+            open_pdf (bool, optional):
+                Whether to open each PDF when it is ready
+            **options:
+                Passed to `render_all`
+
+        Returns:
+            results (dict):
+                The path to the PDF for each journal or, if it failed to
+                compile, the output of LaTeX
+        """
+        texts = self.render_all(journals, **options)
+        model = self.affiliation_model(
+            options.get("alphabetical", False),
+            options.get("alphabetical_after", 1),
+            options.get("alphabetical_groups"),
+        )
+        longauth = {"aanda": {"longauth": len(model.institutes) > 20}}
+        return preview_many(texts, longauth, max_workers, timeout, open_pdf)
+
+    def write(self, stream: TextIO, journal: str = "aanda", **options) -> None:
+        """Write the LaTeX tags for a journal to a text stream, as they are
+        generated
+
+        Args:
+            stream (TextIO):
+                Where to write, e.g. `sys.stdout` or a file open for writing
+            journal (str, optional):
+                The journal, 'aanda' or 'mnras'
+            **options:
+                Passed to `iter_AandA` or `iter_MNRAS`
 
-    def query_author(self, author: str):
-        if author in self.all_known_authors:
-            return author, self.all_known_authors[author]
-
-        last_name = name_to_last(author)
-        for name, data in self.all_known_authors.items():
-            _last = name_to_last(name)
-            if last_name.casefold() == _last.casefold():
-                return name, data
-            if tex_deescape(last_name) == _last:
-                return name, data
-            if last_name.casefold() in data.get("nickname", "").casefold():
-                return name, data
-            if last_name.casefold() in strip_accents(_last).casefold():
-                return name, data
-        return ValueError("unreachable")
+        Examples:
+            >>> with open('authors.tex', 'w', encoding='utf-8') as f:
+            ...     authors.write(f, 'mnras', line_breaks=4)
+        """
+        _check_journals([journal])
+        chunks = getattr(self, f"iter_{JOURNALS[journal]}")(**options)
+        for chunk in chunks:
+            stream.write(chunk)
+
+    def query_author(self, author: str) -> Tuple[str, dict]:
+        """ Get the name and information of a known author
+
+        Args:
+            author (str):
+                The name of the author, as in the author list or in any of the
+                forms accepted for known authors
+
+        Returns:
+            name (str):
+                The name of the author in the database
+            data (dict):
+                The information about the author
+
+        Raises:
+            ValueError:
+                If `author` is not a known author
+        """
+        if author in self.resolved:
+            name, _ = self.resolved[author]
+        else:
+            match = self.names.resolve(author)
+            if match is None or match[0] is None:
+                closest = author_index().search(author, 1)
+                hint = f' (closest match: "{closest[0][0]}")' if closest else ''
+                raise ValueError(f'author "{author}" is not known{hint}')
+            name, _ = match
+        return name, self.all_known_authors[name]
 
     def _get_name(self, name: str, data: dict, force_initials: bool = True):
         if "spelling" in data:
@@ -651,35 +1354,22 @@ class Authors(AandA, MNRAS):
         return name
 
     @property
-    def institutes_in_list(self):
-        institutes_in_list = []
-        for i, author in enumerate(self.all_authors):
-            if not self.known[i]:
-                continue
-            _, data = self.query_author(author)
-            institutes = data["affiliations"]
-            for institute in institutes:
-                if isinstance(institute, dict):
-                    institute = list(institute.keys())[0]
-            if institute not in institutes_in_list:
-                institutes_in_list.append(institute)
-        return institutes_in_list
+    def institutes_in_list(self) -> List[str]:
+        """ All the institutes of the known authors, in order of appearance """
+        return list(self.affiliation_model().institutes)
 
     @property
-    def numbers(self):
-        numbers = []
-        for i, author in enumerate(self.all_authors):
-            if not self.known[i]:
-                continue
-            numbers_i = []
-            _, data = self.query_author(author)
-            institutes = data["affiliations"]
-            for institute in institutes:
-                if isinstance(institute, dict):
-                    institute = list(institute.keys())[0]
-                numbers_i.append(self.institutes_in_list.index(institute) + 1)
-            numbers.append(numbers_i)
-        return numbers
+    def numbers(self) -> List[List[int]]:
+        """ The numbers of the institutes of each known author (see
+        `institutes_in_list`), starting from 1 """
+        model = self.affiliation_model()
+        return [list(numbers) for numbers, known in zip(model.numbers, model.known) if known]
+
+    @property
+    def incidence(self) -> IncidenceMatrix:
+        """ The author × institute incidence matrix, for all the authors in
+        the list and all the institutes in `institutes_in_list` """
+        return self.affiliation_model().incidence
 
     def acknowledgements(self, show: bool = True, save_to_file: str = None):
         from hashlib import md5
@@ -688,6 +1378,8 @@ class Authors(AandA, MNRAS):
         hash_akn = defaultdict(str)
         hash_names = defaultdict(list)
         for author in self.all_authors:
+            if author not in self.resolved:
+                continue
             name, data = self.query_author(author)
             if "acknowledgements" in data:
                 print(name)
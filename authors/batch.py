@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union
+
+from .authors import Authors, _check_journals, _known_names
+from .database import KnownAuthors, get_database, use_database
+
+
+def _init_worker(database: KnownAuthors):
+    # the snapshot comes already loaded and indexed from the main process
+    use_database(database)
+
+
+def render_file(file: str, journals: List[str], out_dir: str) -> dict:
+    """Render one author list for several journals
+
+    The output for each journal is written to `out_dir/<name>-<journal>.tex`,
+    where `<name>` is the name of `file` without the extension.
+
+    Returns:
+        result (dict):
+            With the input `file`, the `outputs` for each journal, the
+            `unknown` authors and, if something failed (including a missing
+            or unreadable file), the `error`
+    """
+    result = {"file": file, "outputs": {}, "unknown": [], "error": None}
+    try:
+        # read the file here: Authors(file) takes a missing file for a name
+        with open(file, encoding="utf-8") as f:
+            authors = Authors.from_list(f.read().splitlines(), warn_unknown=False)
+        name = os.path.splitext(os.path.basename(file))[0]
+        for journal, text in authors.render_all(journals).items():
+            output = os.path.join(out_dir, f"{name}-{journal}.tex")
+            with open(output, "w", encoding="utf-8") as f:
+                print(text, file=f)
+            result["outputs"][journal] = output
+        result["unknown"] = authors.unknown_authors
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def batch(files: List[str], journals: List[str] = ("aanda",), out_dir: str = ".",
+          jobs: Union[int, None] = None) -> List[dict]:
+    """Render many author lists for several journals, in parallel
+
+    The database is loaded and indexed once, and then shared with a pool of
+    worker processes, each rendering whole files.
+
+    Args:
+        files (List[str]):
+            The files with the author lists
+        journals (List[str], optional):
+            The journals, any of 'aanda' and 'mnras'
+        out_dir (str, optional):
+            Where to write the outputs (created if needed)
+        jobs (int, optional):
+            Number of worker processes. By default, the number of CPUs.
+
+    Returns:
+        results (List[dict]):
+            The result of `render_file` for each file, in the same order
+    """
+    _check_journals(journals)
+    names = [os.path.splitext(os.path.basename(file))[0] for file in files]
+    duplicates = sorted(set(name for name in names if names.count(name) > 1))
+    if duplicates:
+        raise ValueError(f"outputs would overwrite each other: {', '.join(duplicates)}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    database = get_database()
+    database.derived("names", _known_names)
+
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    if jobs <= 1:
+        return [render_file(file, journals, out_dir) for file in files]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(database,)) as executor:
+        futures = [executor.submit(render_file, file, journals, out_dir) for file in files]
+        return [future.result() for future in futures]
+
+
+def summary(results: List[dict]) -> str:
+    """ A summary of the results of `batch`, with the unknown authors in each file """
+    lines = []
+    for result in results:
+        if result["error"] is not None:
+            lines.append(f"{result['file']}: failed ({result['error']})")
+            continue
+        outputs = ", ".join(result["outputs"].values())
+        lines.append(f"{result['file']}: {outputs}")
+        if result["unknown"]:
+            lines.append(f"  {len(result['unknown'])} unknown author(s): "
+                         + ", ".join(result["unknown"]))
+    return "\n".join(lines)
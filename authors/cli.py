@@ -1,22 +1,79 @@
+import json
+import sys
 from argparse import ArgumentParser
 from .authors import Authors
 from .authors import delete_author, update_author_email, update_author_name, update_author_orcid
+from .authors import health_check_report, apply_health_check
 
 
 def cli_authors():
+    if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+        return cli_batch(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        return cli_serve(sys.argv[2:])
+
     parser = ArgumentParser()
     parser.add_argument('file', type=str)
     parser.add_argument('-j', '--jornal', type=str, 
                         default='aanda', choices=['aanda', 'mnras'])
     parser.add_argument('-p', '--preview', action='store_true')
+    parser.add_argument('-w', '--watch', action='store_true',
+                        help='render again whenever the file or the database change')
+    parser.add_argument('--interval', type=float, default=0.5,
+                        help='how often to check for changes in watch mode (seconds)')
     args = parser.parse_args()
-    
+
+    if args.watch:
+        from .watch import watch
+        watch(args.file, args.jornal, args.preview, args.interval)
+        return
+
     a = Authors(args.file)
-    if args.jornal == 'aanda':
+    if not args.preview:
+        # stream the output instead of building it all first
+        a.write(sys.stdout, args.jornal)
+        print()
+    elif args.jornal == 'aanda':
         a.AandA(preview=args.preview)
     elif args.jornal == 'mnras':
         a.MNRAS(preview=args.preview)
 
+def cli_batch(argv=None):
+    from .batch import batch, summary
+    parser = ArgumentParser(prog='authors batch',
+                            description='Render many author lists for one or more journals')
+    parser.add_argument('files', type=str, nargs='+')
+    parser.add_argument('--journal', '--jornal', type=str, default='aanda',
+                        help='comma-separated journals, e.g. aanda,mnras')
+    parser.add_argument('--out-dir', type=str, default='.',
+                        help='where to write the <file>-<journal>.tex outputs')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='number of worker processes (default: number of CPUs)')
+    args = parser.parse_args(argv)
+
+    journals = [journal.strip() for journal in args.journal.split(',') if journal.strip()]
+    try:
+        results = batch(args.files, journals, args.out_dir, args.jobs)
+    except ValueError as e:
+        parser.error(str(e))
+    print(summary(results))
+    if any(result['error'] is not None for result in results):
+        sys.exit(1)
+
+
+def cli_serve(argv=None):
+    from .server import serve
+    parser = ArgumentParser(prog='authors serve',
+                            description='Serve the rendering of author lists over HTTP')
+    parser.add_argument('--host', type=str, default='127.0.0.1',
+                        help='address to listen on (default: only local connections)')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help="don't log each request")
+    args = parser.parse_args(argv)
+    serve(args.host, args.port, args.quiet)
+
+
 def cli_update_author_name():
     doc = update_author_name.__doc__.split('\n')[0]
     parser = ArgumentParser(description=doc)
@@ -50,3 +107,30 @@ def cli_delete_author():
     parser.add_argument('author', type=str)
     args = parser.parse_args()
     delete_author(args.author)
+
+
+def cli_health_check():
+    parser = ArgumentParser(description='Check the database of known authors')
+    parser.add_argument('--report', type=str,
+                        help='file where to save the report (JSON), instead of printing it')
+    parser.add_argument('--apply', type=str, metavar='REPORT',
+                        help='apply the fixes in a (JSON) report file')
+    parser.add_argument('--no-affiliations', action='store_true',
+                        help="don't look for similar affiliations")
+    parser.add_argument('--threshold', type=float, default=0.7,
+                        help='similarity threshold for affiliations (default 0.7)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='number of processes used to compare affiliations')
+    args = parser.parse_args()
+
+    if args.apply is not None:
+        with open(args.apply, encoding='utf-8') as f:
+            apply_health_check(json.load(f))
+        return
+
+    report = health_check_report(not args.no_affiliations, args.threshold, args.workers)
+    if args.report is None:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
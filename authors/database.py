@@ -0,0 +1,370 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from typing import Callable, Iterable, Union
+
+from yaml import safe_load as load, safe_dump as dump
+
+from .utils import user_cache_dir
+
+# increase when the format of the cache files changes
+_CACHE_VERSION = 1
+
+DEFAULT_DATABASE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "all_known_authors.yml"
+)
+
+
+def cache_file_for(filename: str) -> str:
+    """ Path to the cache file of the parsed contents of `filename` """
+    key = hashlib.sha1(os.path.abspath(filename).encode("utf-8")).hexdigest()
+    return os.path.join(user_cache_dir(), f"known_authors-{key[:16]}.pickle")
+
+
+def _read_cache_header(stream):
+    try:
+        header = pickle.load(stream)
+    except Exception:
+        return None
+    if not isinstance(header, dict) or header.get("version") != _CACHE_VERSION:
+        return None
+    return header
+
+
+def _write_cache(cache_file: str, header: dict, data: dict):
+    """ Atomically write the cache file, ignoring any errors """
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(cache_file), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as stream:
+                pickle.dump(header, stream, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    except OSError:
+        pass
+
+
+def load_known_authors(filename: str, use_cache: bool = True) -> dict:
+    """Load the YAML file with the known authors, using a binary cache
+
+    The parsed contents of the YAML file are stored in a pickle file in the
+    user cache directory (see `utils.user_cache_dir`). The cache is used if
+    the size and modification time of the YAML file did not change or, if
+    they did, if the SHA-256 hash of its contents is still the same. Otherwise
+    the YAML file is parsed again and the cache is rebuilt.
+
+    Args:
+        filename (str):
+            Path to the YAML file
+        use_cache (bool, optional):
+            Whether to read and write the cache file
+
+    Returns:
+        known_authors (dict):
+            Dictionary with information about the known authors
+    """
+    if not use_cache:
+        with open(filename, encoding="utf-8") as stream:
+            return load(stream)
+
+    stat = os.stat(filename)
+    cache_file = cache_file_for(filename)
+
+    header = None
+    try:
+        with open(cache_file, "rb") as stream:
+            header = _read_cache_header(stream)
+            if (header is not None
+                    and header["size"] == stat.st_size
+                    and header["mtime_ns"] == stat.st_mtime_ns):
+                return pickle.load(stream)
+    except Exception:
+        header = None
+
+    with open(filename, "rb") as stream:
+        raw = stream.read()
+    sha256 = hashlib.sha256(raw).hexdigest()
+
+    data = None
+    if header is not None and header["sha256"] == sha256:
+        try:
+            with open(cache_file, "rb") as stream:
+                _read_cache_header(stream)
+                data = pickle.load(stream)
+        except Exception:
+            data = None
+
+    if data is None:
+        data = load(raw.decode("utf-8"))
+
+    header = {
+        "version": _CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+    }
+    _write_cache(cache_file, header, data)
+    return data
+
+
+def store_cache(filename: str, data: dict, sha256: Union[str, None] = None):
+    """ Store `data` as the cached contents of the YAML file `filename` """
+    stat = os.stat(filename)
+    if sha256 is None:
+        with open(filename, "rb") as stream:
+            sha256 = hashlib.sha256(stream.read()).hexdigest()
+    header = {
+        "version": _CACHE_VERSION,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": sha256,
+    }
+    _write_cache(cache_file_for(filename), header, data)
+
+
+class _HumanizedWriter:
+    """Text stream that writes the YAML dump in the layout of
+    `utils.humanize_yaml`, with an empty line before every line that does not
+    start with a space, to an underlying binary stream"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self._line_start = True
+
+    def write(self, text: str):
+        out = []
+        parts = text.split("\n")
+        for k, part in enumerate(parts):
+            if k > 0:
+                out.append("\n")
+                self._line_start = True
+            if part:
+                if self._line_start and not part.startswith(" "):
+                    out.append("\n")
+                out.append(part)
+                self._line_start = False
+            elif self._line_start and k < len(parts) - 1:  # empty line
+                out.append("\n")
+        # same newline translation as a file opened in text mode
+        data = "".join(out).replace("\n", os.linesep).encode("utf-8")
+        self.sha256.update(data)
+        self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def dump_known_authors(filename: str, data: dict) -> str:
+    """Write the dictionary of known authors to the YAML file `filename`
+
+    The file is written in a single pass to a temporary file, which then
+    replaces `filename` atomically.
+
+    Returns:
+        sha256 (str):
+            The SHA-256 hash of the contents of the file
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as stream:
+            writer = _HumanizedWriter(stream)
+            dump(data, writer, allow_unicode=True, width=500, line_break=True)
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp, 0o666 & ~umask)
+        os.replace(tmp, filename)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return writer.sha256.hexdigest()
+
+
+def copy_known_authors(data: dict) -> dict:
+    """ Deep copy of the dictionary of known authors """
+    # faster than copy.deepcopy for these nested dicts, lists and strings
+    return pickle.loads(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class YAMLBackend:
+    """Store the database of known authors in a (human-readable) YAML file"""
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def __repr__(self):
+        return f"YAMLBackend({self.filename!r})"
+
+    def signature(self):
+        """ Changes whenever the file changes on disk """
+        stat = os.stat(self.filename)
+        return stat.st_size, stat.st_mtime_ns
+
+    def load(self) -> dict:
+        return load_known_authors(self.filename)
+
+    def save(self, data: dict, changed: Union[Iterable[str], None] = None):
+        """ Write `data` to the file. The whole file is always rewritten, so
+        `changed` is ignored. """
+        sha256 = dump_known_authors(self.filename, data)
+        store_cache(self.filename, data, sha256)
+
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+
+
+def backend_for(filename: str):
+    """ Get the storage backend for `filename`, based on its extension """
+    if filename.lower().endswith(SQLITE_EXTENSIONS):
+        from .sqlite_database import SQLiteBackend
+        return SQLiteBackend(filename)
+    return YAMLBackend(filename)
+
+
+class KnownAuthors:
+    """Lazily loaded snapshot of the database of known authors
+
+    The database is only read when `data` is first accessed, and read again
+    when it changes on disk (or when `reload` is called). Objects derived from
+    the data (like the index of names) can be cached with `derived` and are
+    discarded whenever the data changes.
+
+    The database is stored in a YAML file or, if `filename` ends with .sqlite,
+    .sqlite3 or .db, in an SQLite database (see `sqlite_database`).
+
+    !!! Warning
+        The dictionary in `data` is shared by every user of the snapshot and
+        should not be modified. Use `get_all_known_authors` to get a copy.
+    """
+
+    def __init__(self, filename: str = DEFAULT_DATABASE):
+        self.filename = filename
+        self.backend = backend_for(filename)
+        self.generation = 0
+        self._data = None
+        self._signature = None
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    def __repr__(self):
+        return f"KnownAuthors({self.filename!r})"
+
+    def is_stale(self) -> bool:
+        """ Whether the database changed on disk since the data was loaded """
+        if self._data is None:
+            return True
+        try:
+            return self.backend.signature() != self._signature
+        except OSError:
+            return True
+
+    @property
+    def data(self) -> dict:
+        """ Dictionary with information about the known authors """
+        if self.is_stale():
+            with self._lock:
+                if self.is_stale():
+                    self.reload()
+        return self._data
+
+    def reload(self):
+        """ Read the database from disk """
+        with self._lock:
+            signature = self.backend.signature()
+            data = self.backend.load()
+            self._set(data, signature)
+
+    def save(self, data: dict, changed: Union[Iterable[str], None] = None):
+        """Write `data` to disk and make it the current snapshot
+
+        Args:
+            data (dict):
+                Dictionary with information about the known authors
+            changed (iterable, optional):
+                Names of the authors that were added, changed or removed since
+                the data was loaded, if known. Backends that support it only
+                write those authors.
+
+        !!! Warning
+            The snapshot keeps a reference to `data`, which should not be
+            modified afterwards.
+        """
+        with self._lock:
+            self.backend.save(data, changed)
+            # same order as when loading the database
+            self._set({name: data[name] for name in sorted(data)},
+                      self.backend.signature())
+
+    def __getstate__(self):
+        # the lock cannot be pickled, e.g. to send the snapshot to a worker process
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
+    def _set(self, data: dict, signature):
+        self._data = data
+        self._signature = signature
+        self._derived = {}
+        self.generation += 1
+
+    def derived(self, key: str, factory: Callable[[dict], object]):
+        """Get an object derived from the current data, building it if needed
+
+        Args:
+            key (str):
+                Name of the derived object
+            factory (callable):
+                Function that builds the object from the data
+        """
+        with self._lock:
+            data = self.data
+            if key not in self._derived:
+                self._derived[key] = factory(data)
+            return self._derived[key]
+
+
+_database = None
+
+
+def get_database() -> KnownAuthors:
+    """Get the process-wide snapshot of the database of known authors
+
+    The database file can be set with the `AUTHORS_DATABASE` environment
+    variable or with `use_database`.
+    """
+    global _database
+    if _database is None:
+        _database = KnownAuthors(os.environ.get("AUTHORS_DATABASE", DEFAULT_DATABASE))
+    return _database
+
+
+def use_database(filename: Union[str, KnownAuthors, None] = None) -> KnownAuthors:
+    """Use another file as the database of known authors
+
+    Args:
+        filename (str or KnownAuthors, optional):
+            Path to the file, or an existing (possibly already loaded)
+            snapshot. If None, use the default database.
+    """
+    global _database
+    if isinstance(filename, KnownAuthors):
+        _database = filename
+    else:
+        _database = KnownAuthors(filename or DEFAULT_DATABASE)
+    return _database
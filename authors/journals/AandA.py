@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Iterator, List
 
 if TYPE_CHECKING:
     from ..authors import Authors
+    from ..model import AffiliationModel
 
 from ..latex_pdf_utils import preview_AandA
-from ..utils import tex_escape
+from ..utils import tex_escape_many
 
 
 class AandA:
@@ -57,107 +58,120 @@ class AandA:
             copy_to_clipboard (bool, optional):
                 Copy the LaTeX tags to the clipboard
         """
-        author_list, known_authors = self._get_author_list(
+        model = self.affiliation_model(
             alphabetical, alphabetical_after, alphabetical_groups
         )
+        text = "".join(self._AandA_chunks(model, add_orcids, add_email, force_initials))
 
-        institutes_in_list = []
-        labels = {}
-
-        text = ""
-
-        # print the authors first
-        text += r"\author{" + "\n"
+        if show:
+            print(text)
 
-        email = ""
+        if save_to_file is not None:
+            with open(save_to_file, "w", encoding="utf-8") as f:
+                print(text, file=f)
 
-        for i, author in enumerate(author_list):
-            if known_authors[i]:
-                name, data = self.query_author(author)
+        if preview:
+            longauth = len(model.institutes) > 20
+            preview_AandA(text, longauth=longauth)
 
-                name = self._get_name(name, data, force_initials)
+        # if copy_to_clipboard:
+        #     pyperclip.copy(text)
 
-                institutes = data["affiliations"]
+        return text
 
-                if add_email and i == 0:
-                    email = data.get("email", "")
+    def iter_AandA(
+        self: Authors,
+        add_orcids: bool = True,
+        alphabetical: bool = False,
+        alphabetical_after: int = 1,
+        alphabetical_groups: List[int] | None = None,
+        add_email: bool = True,
+        force_initials: bool = True,
+    ) -> Iterator[str]:
+        r"""Generate the \author and \institute LaTeX tags for A&A in chunks,
+        one author or institute at a time, without building the whole text
 
-                numbers = []
+        The arguments are the same as for `AandA`. `"".join(chunks)` is what
+        `AandA` returns.
 
-                text += f"  {name} "
+        Examples:
+            >>> for chunk in authors.iter_AandA():
+            ...     f.write(chunk)
+        """
+        model = self.affiliation_model(
+            alphabetical, alphabetical_after, alphabetical_groups
+        )
+        return self._AandA_chunks(model, add_orcids, add_email, force_initials)
 
-                text += r"\inst{"
+    def _AandA_chunks(
+        self: Authors,
+        model: AffiliationModel,
+        add_orcids: bool = True,
+        add_email: bool = True,
+        force_initials: bool = True,
+    ) -> Iterator[str]:
+        r""" Render the \author and \institute tags for A&A from `model`, one
+        author or institute at a time """
+        labels = model.labels
 
-                for j, institute in enumerate(institutes):
-                    label = None
-                    if isinstance(institute, dict):
-                        _institute = list(institute.keys())[0]
-                        label = institute[_institute]["label"]
-                        institute = _institute
+        # print the authors first
+        yield r"\author{" + "\n"
 
-                    if institute not in labels:
-                        labels[institute] = label
+        email = ""
+        last = len(self.all_authors) - 1
 
-                    if institute not in institutes_in_list:
-                        institutes_in_list.append(institute)
+        for i, author in enumerate(model.authors):
+            if model.known[i]:
+                data = model.data[i]
+                name = self._get_name(model.names[i], data, force_initials)
 
-                    numbers.append(institutes_in_list.index(institute) + 1)
+                if add_email and i == 0:
+                    email = data.get("email", "")
 
-                    end = ", " if j < (len(institutes) - 1) else ""
-                    if labels[institute] is None:
-                        text += f"\\ref{{ inst{numbers[-1]} }}{end}"
+                refs = []
+                for number in model.numbers[i]:
+                    label = labels[number - 1]
+                    if label is None:
+                        refs.append(f"\\ref{{ inst{number} }}")
                     else:
-                        text += f"\\ref{{{labels[institute]}}}{end}"
+                        refs.append(f"\\ref{{{label}}}")
 
-                text += r"} "
+                chunk = f"  {name} " + r"\inst{" + ", ".join(refs) + r"} "
 
                 if "orcid" in data and add_orcids:
-                    text += f"\\orcidlink{{{data['orcid']}}} "
+                    chunk += f"\\orcidlink{{{data['orcid']}}} "
 
             else:
-                text += f"  {author} "
-                text += r"\inst{unknown} "
+                chunk = f"  {author} " + r"\inst{unknown} "
 
-            if i < (len(self.all_authors) - 1):
-                text += r"\and" + "\n"
+            if i < last:
+                chunk += r"\and" + "\n"
 
-        text += "\n" + "}" + "\n\n"
+            yield chunk
+
+        yield "\n" + "}" + "\n\n"
 
         # then print the institutes
-        text += r"\institute{" + "\n"
+        yield r"\institute{" + "\n"
 
-        for i, institute in enumerate(institutes_in_list):
-            escaped_institute = tex_escape(institute)
-            label = labels[institute]
-            text += f"  {escaped_institute} "
+        escaped_institutes = tex_escape_many(model.institutes)
+        for i, escaped_institute in enumerate(escaped_institutes):
+            label = labels[i]
+            chunk = f"  {escaped_institute} "
 
             if label is None:
-                text += rf"\label{{ inst{i + 1} }} "
+                chunk += rf"\label{{ inst{i + 1} }} "
             else:
-                text += rf"\label{{{label}}} "
+                chunk += rf"\label{{{label}}} "
 
             if add_email and i == 0 and email != "":
-                text += rf"\\ \email{{{email}}} "
+                chunk += rf"\\ \email{{{email}}} "
 
-            if institute == institutes_in_list[-1]:
-                text += "\n"
+            if i == len(escaped_institutes) - 1:
+                chunk += "\n"
             else:
-                text += r"\and" "\n"
-
-        text += r"}" + "\n"
-
-        if show:
-            print(text)
-
-        if save_to_file is not None:
-            with open(save_to_file, "w", encoding="utf-8") as f:
-                print(text, file=f)
+                chunk += r"\and" "\n"
 
-        if preview:
-            longauth = len(institutes_in_list) > 20
-            preview_AandA(text, longauth=longauth)
-
-        # if copy_to_clipboard:
-        #     pyperclip.copy(text)
+            yield chunk
 
-        return text
+        yield r"}" + "\n"
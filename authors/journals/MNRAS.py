@@ -1,11 +1,12 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Iterator, List
 
 if TYPE_CHECKING:
     from ..authors import Authors
+    from ..model import AffiliationModel
 
 from ..latex_pdf_utils import preview_MNRAS
-from ..utils import tex_escape
+from ..utils import tex_escape_many
 
 
 class MNRAS:
@@ -51,89 +52,90 @@ class MNRAS:
             copy_to_clipboard (bool, optional):
                 Copy the LaTeX tags to the clipboard
         """
-        author_list, known_authors = self._get_author_list(
+        model = self.affiliation_model(
             alphabetical, alphabetical_after, alphabetical_groups
         )
+        text = "".join(self._MNRAS_chunks(model, line_breaks, force_initials))
 
-        institutes_in_list = []
-        labels = {}
-
-        text = ""
-
-        # print the authors first
-        text += r"\author[]{" + "\n"
-
-        for i, author in enumerate(author_list):
-            if known_authors[i]:
-                name, data = self.query_author(author)
-
-                name = self._get_name(name, data, force_initials)
-
-                institutes = data["affiliations"]
+        if show:
+            print(text)
 
-                numbers = []
+        if save_to_file is not None:
+            with open(save_to_file, "w") as f:
+                print(text, file=f)
 
-                text += f"  {name} "
+        if preview:
+            preview_MNRAS(text)
 
-                text += r"$^{"
+        # if copy_to_clipboard:
+        #     pyperclip.copy(text)
 
-                for j, institute in enumerate(institutes):
-                    label = None
-                    if isinstance(institute, dict):
-                        _institute = list(institute.keys())[0]
-                        label = institute[_institute]["label"]
-                        institute = _institute
+        return text
 
-                    if institute not in labels:
-                        labels[institute] = label
+    def iter_MNRAS(
+        self: Authors,
+        line_breaks: int = 6,
+        alphabetical: bool = False,
+        alphabetical_after: int = 1,
+        alphabetical_groups: List[int] | None = None,
+        force_initials: bool = True,
+    ) -> Iterator[str]:
+        r"""Generate the \author LaTeX tag for MNRAS in chunks, one author or
+        institute at a time, without building the whole text
 
-                    if institute not in institutes_in_list:
-                        institutes_in_list.append(institute)
+        The arguments are the same as for `MNRAS`. `"".join(chunks)` is what
+        `MNRAS` returns.
+        """
+        model = self.affiliation_model(
+            alphabetical, alphabetical_after, alphabetical_groups
+        )
+        return self._MNRAS_chunks(model, line_breaks, force_initials)
 
-                    numbers.append(institutes_in_list.index(institute) + 1)
+    def _MNRAS_chunks(
+        self: Authors,
+        model: AffiliationModel,
+        line_breaks: int = 6,
+        force_initials: bool = True,
+    ) -> Iterator[str]:
+        r""" Render the \author tag for MNRAS from `model`, one author or
+        institute at a time """
+        # print the authors first
+        yield r"\author[]{" + "\n"
 
-                    end = r",\, " if j < (len(institutes) - 1) else ""
-                    text += f"{numbers[-1]}{end}"
+        last = len(self.all_authors) - 1
 
-                text += r"}$"
+        for i in range(len(model.authors)):
+            chunk = ""
+            if model.known[i]:
+                name = self._get_name(model.names[i], model.data[i], force_initials)
+                numbers = r",\, ".join(map(str, model.numbers[i]))
+                chunk += f"  {name} " + r"$^{" + numbers + r"}$"
 
-                if i < (len(self.all_authors) - 1):
-                    text += ", "
+                if i < last:
+                    chunk += ", "
 
             if (i + 1) % line_breaks == 0:
-                text += r"\newauthor\,\!"
+                chunk += r"\newauthor\,\!"
+
+            if i < last:
+                chunk += "\n"
 
-            if i < (len(self.all_authors) - 1):
-                text += "\n"
+            yield chunk
 
-        text += "\n"
+        yield "\n"
 
         # then print the institutes
-        text += r"\\" + "\n"
+        yield r"\\" + "\n"
 
-        for i, institute in enumerate(institutes_in_list):
-            escaped_institute = tex_escape(institute)
-            label = labels[institute]
-            text += f" $^{{{i + 1}}}$ {escaped_institute} "
+        escaped_institutes = tex_escape_many(model.institutes)
+        for i, escaped_institute in enumerate(escaped_institutes):
+            chunk = f" $^{{{i + 1}}}$ {escaped_institute} "
 
-            if institute == institutes_in_list[-1]:
-                text += "\n"
+            if i == len(escaped_institutes) - 1:
+                chunk += "\n"
             else:
-                text += r"\\" + "\n"
-
-        text += r"}" + "\n"
-
-        if show:
-            print(text)
+                chunk += r"\\" + "\n"
 
-        if save_to_file is not None:
-            with open(save_to_file, "w") as f:
-                print(text, file=f)
+            yield chunk
 
-        if preview:
-            preview_MNRAS(text)
-
-        # if copy_to_clipboard:
-        #     pyperclip.copy(text)
-
-        return text
+        yield r"}" + "\n"
@@ -1,54 +1,293 @@
+import hashlib
 import os
+import shutil
+import signal
 import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Union
+
+from .utils import user_cache_dir
 
 _here_ = os.path.abspath(os.path.dirname(__file__))
 
-def fill_in_template(text, template, output):
+TEMPLATES = os.path.join(_here_, 'templates')
+
+# change this to invalidate all the cached previews
+_PREVIEW_CACHE_VERSION = 1
+
+
+class LatexError(RuntimeError):
+    """ LaTeX failed to produce a PDF. The output of latexmk is in `log`. """
+
+    def __init__(self, message: str, log: str = ''):
+        super().__init__(message)
+        self.log = log
+
+
+def render_template(text: str, template: str, options: Union[List[str], None] = None) -> str:
+    """Fill in a LaTeX template in memory
+
+    Args:
+        text (str):
+            Replaces the line of the template containing !!authors-institutes!!
+        template (str):
+            Path to the template
+        options (List[str], optional):
+            Class options which replace [??longauth??] in the template, e.g.
+            ['longauth']
+
+    Returns:
+        source (str): The LaTeX source
+    """
     with open(template, 'r', encoding='utf-8') as fin:
-        with open(output, 'w', encoding='utf-8') as fout:
-            for line in fin.readlines():
-                if "!!authors-institutes!!" in line:
-                    print(text, file=fout)
-                else:
-                    print(line, end='', file=fout)
+        lines = fin.readlines()
+    lines = [text + '\n' if "!!authors-institutes!!" in line else line for line in lines]
+    source = ''.join(lines)
+    return source.replace('[??longauth??]', f"[{','.join(options)}]" if options else '')
+
+
+def fill_in_template(text, template, output):
+    with open(output, 'w', encoding='utf-8') as fout:
+        fout.write(render_template(text, template))
+
+
+def preview_cache_dir() -> str:
+    """ Directory where the compiled previews are kept """
+    return os.path.join(user_cache_dir(), 'previews')
+
+
+def preview_key(source: str, jobname: str) -> str:
+    """ Key of the PDF compiled from `source`, which already contains the
+    author block, the template and the class options """
+    h = hashlib.sha256(f'{_PREVIEW_CACHE_VERSION}\0{jobname}\0'.encode('utf-8'))
+    h.update(source.encode('utf-8'))
+    return h.hexdigest()
+
+
+if sys.platform == 'win32':
+    _NEW_PROCESS_GROUP = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+else:
+    _NEW_PROCESS_GROUP = {'start_new_session': True}
+
+
+def _kill_process_group(process: subprocess.Popen):
+    """ Kill a process started with `_NEW_PROCESS_GROUP` and its children """
+    if process.poll() is not None:
+        return
+    if sys.platform == 'win32':
+        subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    else:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def build_pdf(source: str, jobname: str, template_dir: str, use_cache: bool = True,
+              timeout: Union[float, None] = None) -> str:
+    """Compile a LaTeX source into a PDF, in a temporary directory
+
+    The PDF is stored in `preview_cache_dir()` under a hash of `source`, so
+    compiling the same source again returns it immediately. Each call builds
+    in its own directory, so concurrent calls do not interfere.
+
+    Args:
+        source (str):
+            The LaTeX source
+        jobname (str):
+            Name of the .tex file (without extension)
+        template_dir (str):
+            Directory with the class and style files, added to TEXINPUTS
+        use_cache (bool, optional):
+            Whether to return a cached PDF, if there is one
+        timeout (float, optional):
+            Maximum time for latexmk, in seconds
+
+    Returns:
+        pdf (str): Path to the (cached) PDF
+
+    Raises:
+        LatexError: If no PDF was produced
+    """
+    cache_dir = preview_cache_dir()
+    pdf = os.path.join(cache_dir, f'{jobname}-{preview_key(source, jobname)[:32]}.pdf')
+    if use_cache and os.path.exists(pdf):
+        return pdf
+
+    with tempfile.TemporaryDirectory(prefix='authors-') as build:
+        with open(os.path.join(build, f'{jobname}.tex'), 'w', encoding='utf-8') as f:
+            f.write(source)
+
+        env = dict(os.environ)
+        env['TEXINPUTS'] = template_dir + os.pathsep + env.get('TEXINPUTS', '')
+        cmd = ['latexmk', '-f', '-pdf', '-interaction=nonstopmode', f'{jobname}.tex']
+        try:
+            # in its own process group, to also stop pdflatex on timeout
+            process = subprocess.Popen(cmd, cwd=build, env=env, stdout=subprocess.PIPE,
+                                       stderr=subprocess.STDOUT, **_NEW_PROCESS_GROUP)
+        except FileNotFoundError:
+            raise LatexError('latexmk not found, is LaTeX installed?') from None
+        try:
+            output, _ = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            output, _ = process.communicate()
+            log = (output or b'').decode('utf-8', errors='replace')
+            raise LatexError(f'latexmk took more than {timeout} s', log) from None
+        except BaseException:
+            _kill_process_group(process)
+            process.wait()
+            raise
+
+        log = output.decode('utf-8', errors='replace')
+        built = os.path.join(build, f'{jobname}.pdf')
+        if not os.path.exists(built):
+            raise LatexError(f'LaTeX failed to compile {jobname}.tex', log)
+
+        # copy to a temporary file first, so the cache never has partial PDFs
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(built, tmp)
+            os.replace(tmp, pdf)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    return pdf
+
+
+def open_file(path: str):
+    """ Open a file with the default application, on any platform """
+    if sys.platform == 'win32':
+        os.startfile(path)
+        return
+    opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+    try:
+        subprocess.Popen([opener, path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        print(f'could not open {path} ({opener} not found)')
+
 
 def compile_latex(wd, texname, pdfname, open_pdf=True):
     # print('compiling LaTeX...')
     out = subprocess.check_output(f'latexmk -f -pdf {texname}'.split(), cwd=wd)
     pdf = os.path.join(wd, pdfname)
     if open_pdf:
-        os.startfile(pdf)
+        open_file(pdf)
     return pdf
 
 
-def preview_AandA(text, longauth=False, open_pdf=True):
-    template = os.path.join(_here_, 'templates', 'aa', 'aa-template.tex')
-    output = os.path.join(_here_, 'templates', 'aa', 'aa.tex')
+# name of the template (and of the document) for each journal
+JOBNAMES = {
+    'aanda': 'aa',
+    'mnras': 'mnras',
+}
+
+
+def preview_source(journal: str, text: str, longauth: bool = False):
+    """Fill in the template of a journal with the LaTeX tags in `text`
+
+    Returns:
+        source (str): The LaTeX source
+        jobname (str): The name of the document
+        template_dir (str): The directory with the template and class files
+    """
+    jobname = JOBNAMES[journal]
+    template_dir = os.path.join(TEMPLATES, jobname)
+    template = os.path.join(template_dir, f'{jobname}-template.tex')
     assert os.path.exists(template)
-    fill_in_template(text, template, output)
-
-    # longauth option to aa class
-    with open(output, 'r', encoding='utf-8') as fin:
-        text = fin.read()
-        if longauth:
-            text = text.replace('[??longauth??]', '[longauth]')
-        else:
-            text = text.replace('[??longauth??]', '')
-    with open(output, 'w', encoding='utf-8') as fout:
-        fout.write(text)
-    ##
+    source = render_template(text, template, ['longauth'] if longauth else None)
+    return source, jobname, template_dir
 
-    path = os.path.join(_here_, 'templates', 'aa')
-    pdf = compile_latex(path, 'aa.tex', 'aa.pdf', open_pdf)
+
+def continuous_preview(jobname: str, template_dir: str, build_dir: str) -> subprocess.Popen:
+    """Start `latexmk -pvc` on `build_dir/jobname.tex`, which then recompiles
+    (and updates the viewer) whenever that file changes
+
+    Returns:
+        process (subprocess.Popen): The latexmk process, to be terminated
+
+    Raises:
+        LatexError: If latexmk is not installed
+    """
+    env = dict(os.environ)
+    env['TEXINPUTS'] = template_dir + os.pathsep + env.get('TEXINPUTS', '')
+    cmd = ['latexmk', '-pvc', '-f', '-pdf', '-interaction=nonstopmode', f'{jobname}.tex']
+    try:
+        return subprocess.Popen(cmd, cwd=build_dir, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        raise LatexError('latexmk not found, is LaTeX installed?') from None
+
+
+def preview_AandA(text, longauth=False, open_pdf=True, use_cache=True, timeout=None):
+    source, jobname, template_dir = preview_source('aanda', text, longauth)
+    pdf = build_pdf(source, jobname, template_dir, use_cache, timeout)
+    if open_pdf:
+        open_file(pdf)
     return pdf
 
 
-def preview_MNRAS(text, open_pdf=True):
-    template = os.path.join(_here_, 'templates', 'mnras', 'mnras-template.tex')
-    output = os.path.join(_here_, 'templates', 'mnras', 'mnras.tex')
-    assert os.path.exists(template)
-    fill_in_template(text, template, output)
-    path = os.path.join(_here_, 'templates', 'mnras')
-    pdf = compile_latex(path, 'mnras.tex', 'mnras.pdf', open_pdf)
+def preview_MNRAS(text, open_pdf=True, use_cache=True, timeout=None):
+    source, jobname, template_dir = preview_source('mnras', text)
+    pdf = build_pdf(source, jobname, template_dir, use_cache, timeout)
+    if open_pdf:
+        open_file(pdf)
     return pdf
 
+
+# preview function for each journal
+PREVIEWS = {
+    'aanda': preview_AandA,
+    'mnras': preview_MNRAS,
+}
+
+
+def preview_many(texts: Dict[str, str], options: Union[Dict[str, dict], None] = None,
+                 max_workers: Union[int, None] = None, timeout: Union[float, None] = None,
+                 open_pdf: bool = False) -> Dict[str, str]:
+    """Compile the previews for several journals concurrently
+
+    Args:
+        texts (dict):
+            The LaTeX tags for each journal, e.g. from `Authors.render_all`
+        options (dict, optional):
+            Extra arguments for the preview of each journal, e.g.
+            {'aanda': {'longauth': True}}
+        max_workers (int, optional):
+            Maximum number of previews compiled at the same time. By
+            default, the number of CPUs.
+        timeout (float, optional):
+            Maximum time for each compilation, in seconds
+        open_pdf (bool, optional):
+            Whether to open each PDF when it is ready
+
+    Returns:
+        results (dict):
+            The path to the PDF for each journal or, if it failed to compile,
+            the output of LaTeX (or the error)
+    """
+    options = options or {}
+    workers = max(1, min(len(texts), max_workers or os.cpu_count() or 1))
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            journal: executor.submit(PREVIEWS[journal], text, open_pdf=open_pdf,
+                                     timeout=timeout, **options.get(journal, {}))
+            for journal, text in texts.items()
+        }
+        for journal, future in futures.items():
+            try:
+                results[journal] = future.result()
+            except LatexError as e:
+                print(f'could not compile the preview for {journal}: {e}')
+                results[journal] = e.log or str(e)
+            except Exception as e:
+                # one journal failing should not lose the others
+                print(f'could not compile the preview for {journal}: {e!r}')
+                results[journal] = f'{type(e).__name__}: {e}'
+    return results
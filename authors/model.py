@@ -0,0 +1,164 @@
+from array import array
+from typing import Callable, List, Tuple, Union
+
+
+class IncidenceMatrix:
+    """Sparse author × institute matrix, in compressed sparse row format
+
+    The institutes of author `i` (0-based, as in the author list) are
+    `indices[indptr[i]:indptr[i + 1]]`, in the order of their affiliations,
+    also 0-based.
+
+    Attributes:
+        shape (Tuple[int, int]): Number of authors and of institutes
+        indptr (array): Where the row of each author starts in `indices`
+        indices (array): Institute of each nonzero element
+    """
+
+    def __init__(self, numbers: List[List[int]], n_institutes: int):
+        """
+        Args:
+            numbers (List[List[int]]):
+                The numbers of the institutes of each author, starting from 1
+            n_institutes (int):
+                Total number of institutes
+        """
+        self.shape = (len(numbers), n_institutes)
+        self.indptr = array("l", [0])
+        self.indices = array("l")
+        for row in numbers:
+            self.indices.extend(number - 1 for number in row)
+            self.indptr.append(len(self.indices))
+        self._columns = None
+
+    def __repr__(self):
+        return f"IncidenceMatrix(shape={self.shape}, nnz={self.nnz})"
+
+    @property
+    def nnz(self) -> int:
+        """ Number of nonzero elements """
+        return len(self.indices)
+
+    def __contains__(self, item: Tuple[int, int]) -> bool:
+        author, institute = item
+        start, end = self.indptr[author], self.indptr[author + 1]
+        return institute in self.indices[start:end]
+
+    def institutes_of(self, author: int) -> List[int]:
+        """ The institutes of `author` (both 0-based indices) """
+        return self.indices[self.indptr[author]:self.indptr[author + 1]].tolist()
+
+    def authors_of(self, institute: int) -> List[int]:
+        """ The authors with `institute` (both 0-based indices), in order """
+        if self._columns is None:
+            self._columns = [[] for _ in range(self.shape[1])]
+            for author in range(self.shape[0]):
+                for j in self.indices[self.indptr[author]:self.indptr[author + 1]]:
+                    self._columns[j].append(author)
+        return list(self._columns[institute])
+
+    def to_dense(self) -> List[List[int]]:
+        """ The full matrix, as a list of rows of zeros and ones """
+        dense = [[0] * self.shape[1] for _ in range(self.shape[0])]
+        for author in range(self.shape[0]):
+            for j in self.indices[self.indptr[author]:self.indptr[author + 1]]:
+                dense[author][j] = 1
+        return dense
+
+
+class AffiliationModel:
+    """The authors of a paper, in order, with their numbered institutes
+
+    This is what all the journal renderers need: the known authors resolved
+    to the database, and the institutes numbered in order of first
+    appearance, with their labels. It is built once for each author order.
+
+    Attributes:
+        authors (List[str]):
+            The names as given in the author list, in order
+        known (List[bool]):
+            Whether each author is known
+        names (List[str | None]):
+            The name of the matching known author (None for unknown authors)
+        data (List[dict | None]):
+            The information about each known author (None for unknown authors)
+        numbers (List[List[int]]):
+            The numbers of the institutes of each author, starting from 1
+            (empty for unknown authors)
+        institutes (List[str]):
+            The institutes, in order of first appearance
+        labels (List[str | None]):
+            The label of each institute, from its first appearance
+    """
+
+    def __init__(self, authors: List[str], known: List[bool],
+                 query_author: Callable[[str], Tuple[str, dict]]):
+        """
+        Args:
+            authors (List[str]):
+                The author list, in the order it should be rendered
+            known (List[bool]):
+                Whether each author is known
+            query_author (callable):
+                Function returning the name and information of a known author
+        """
+        self.authors = []
+        self.known = []
+        self.names = []
+        self.data = []
+        self.numbers = []
+        self.institutes = []
+        self.labels = []
+
+        self._numbering = {}
+        self._incidence = None
+        for author, is_known in zip(authors, known):
+            self.append(author, is_known, query_author)
+
+    def __repr__(self):
+        return (f"AffiliationModel({len(self.authors)} authors, "
+                f"{len(self.institutes)} institutes)")
+
+    def append(self, author: str, known: bool,
+               query_author: Callable[[str], Tuple[str, dict]]):
+        """ Add an author at the end, numbering any new institutes """
+        self.authors.append(author)
+        self.known.append(known)
+        self._incidence = None
+
+        if not known:
+            self.names.append(None)
+            self.data.append(None)
+            self.numbers.append([])
+            return
+
+        name, data = query_author(author)
+        numbers = []
+        for institute in data["affiliations"]:
+            label = None
+            if isinstance(institute, dict):
+                _institute = next(iter(institute))
+                label = institute[_institute]["label"]
+                institute = _institute
+
+            number = self._numbering.get(institute)
+            if number is None:
+                number = self._numbering[institute] = len(self.institutes) + 1
+                self.institutes.append(institute)
+                self.labels.append(label)
+            numbers.append(number)
+
+        self.names.append(name)
+        self.data.append(data)
+        self.numbers.append(numbers)
+
+    def number(self, institute: str) -> Union[int, None]:
+        """ The number of `institute`, or None if no author has it """
+        return self._numbering.get(institute)
+
+    @property
+    def incidence(self) -> IncidenceMatrix:
+        """ The author × institute incidence matrix """
+        if self._incidence is None:
+            self._incidence = IncidenceMatrix(self.numbers, len(self.institutes))
+        return self._incidence
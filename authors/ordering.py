@@ -0,0 +1,94 @@
+import re
+from typing import List, Sequence, Tuple, Union
+
+from .utils import find_bracket_last_name, strip_accents
+
+# lowercase words which are not used to sort a last name ("van der Berg" is
+# sorted with the B's), unless they are capitalized ("Van Damme")
+PARTICLES = {
+    'af', 'da', 'das', 'de', 'degli', 'dei', 'del', 'della', 'delle', 'dello',
+    'den', 'der', 'des', 'di', 'do', 'dos', 'du', 'el', 'la', 'las', 'le',
+    'les', 'lo', 'los', 'op', "'t", 'te', 'ten', 'ter', 'van', 'von', 'y', 'zu',
+}
+
+# letters which do not decompose into a base letter and an accent
+_FOLD = str.maketrans({
+    'ø': 'o', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'ħ': 'h', 'ı': 'i', 'ŧ': 't',
+    'æ': 'ae', 'œ': 'oe', 'þ': 'th',
+})
+
+_NOT_ALPHANUMERIC = re.compile(r"[^\w ]")
+
+
+def fold(text: str) -> str:
+    """ Casefold `text`, remove accents and anything but letters, digits and
+    spaces, e.g. "O'Brién-Ødegård" -> "obrienodegard" """
+    text = strip_accents(text.casefold()).translate(_FOLD)
+    return _NOT_ALPHANUMERIC.sub('', text)
+
+
+def collation_key(name: str) -> Tuple[str, str]:
+    """Key to sort `name` alphabetically by last name
+
+    The last name is either the last word or the part of the name in {} or
+    [] (see `utils.find_bracket_last_name`), together with any lowercase
+    particles ("van", "de la", ...) just before it. The key is the folded
+    last name without the particles, then the particles.
+
+    Examples:
+        >>> collation_key('Jane {van der Berg}')
+        ('berg', 'van der')
+        >>> collation_key('Ludwig van Beethoven')
+        ('beethoven', 'van')
+        >>> collation_key('Jean-Claude Van Damme')
+        ('damme', '')
+    """
+    name = ' '.join(name.split())
+    _, last_name = find_bracket_last_name(name) if ' ' in name else (name, None)
+    if last_name is None:
+        words = name.split(' ')
+        start = len(words) - 1
+        while start > 1 and words[start - 1] in PARTICLES:
+            start -= 1
+        words = words[start:]
+    else:
+        words = last_name.split()
+
+    particles = []
+    while len(words) > 1 and words[0] in PARTICLES:
+        particles.append(words.pop(0))
+    return fold(' '.join(words)), fold(' '.join(particles))
+
+
+def alphabetical_order(keys: Sequence, alphabetical_after: int = 1,
+                       alphabetical_groups: Union[List[int], None] = None) -> List[int]:
+    """Order of a list sorted alphabetically, except for the first elements
+
+    Args:
+        keys (Sequence):
+            The key of each element (e.g. from `collation_key`)
+        alphabetical_after (int, optional):
+            Keep the order of the first elements, up to this one, and sort the
+            others.
+        alphabetical_groups (List[int], optional):
+            If provided, keep the order of the elements up to the first
+            group, and sort the elements in each group separately
+            (`alphabetical_after` is ignored). For example, [5, 10] keeps
+            elements 1 to 5, sorts elements 6 to 10, and then 11 onwards.
+            The list is not modified.
+
+    Returns:
+        The indices of the elements, in the new order. The sort is stable, so
+        elements with the same key keep their order.
+    """
+    n = len(keys)
+    if alphabetical_groups is None:
+        bounds = [alphabetical_after, n]
+    else:
+        bounds = list(alphabetical_groups) + [n]
+
+    order = list(range(min(max(bounds[0], 0), n)))
+    for start, end in zip(bounds, bounds[1:]):
+        start, end = max(start, 0), min(end, n)
+        order.extend(sorted(range(start, end), key=keys.__getitem__))
+    return order
@@ -0,0 +1,201 @@
+import json
+import traceback
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from .authors import Authors, _known_names, author_index
+from .database import get_database
+
+# maximum size of the body of a request, in bytes
+MAX_BODY = 1 << 20
+
+
+class _RequestError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def _is_int(value, minimum: int) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and value >= minimum
+
+
+# the options of `Authors.render_all` and how to check their values
+RENDER_OPTIONS = {
+    "alphabetical": (lambda v: isinstance(v, bool), "a boolean"),
+    "alphabetical_after": (lambda v: _is_int(v, 0), "a non-negative integer"),
+    "alphabetical_groups": (lambda v: v is None or (isinstance(v, list) and all(
+        _is_int(n, 0) for n in v)), "a list of non-negative integers"),
+    "force_initials": (lambda v: isinstance(v, bool), "a boolean"),
+    "add_orcids": (lambda v: isinstance(v, bool), "a boolean"),
+    "add_email": (lambda v: isinstance(v, bool), "a boolean"),
+    "line_breaks": (lambda v: _is_int(v, 1), "a positive integer"),
+}
+
+
+def _check_options(options: dict):
+    for name, value in options.items():
+        if name not in RENDER_OPTIONS:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, f"unknown option '{name}'",
+                                options=sorted(RENDER_OPTIONS))
+        check, expected = RENDER_OPTIONS[name]
+        if not check(value):
+            raise _RequestError(HTTPStatus.BAD_REQUEST, f"option '{name}' should be {expected}")
+
+
+class AuthorsRequestHandler(BaseHTTPRequestHandler):
+    server_version = "authors"
+    quiet = False
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: HTTPStatus, content: dict):
+        body = json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, routes: dict):
+        url = urlsplit(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            route = routes.get(url.path.rstrip("/") or "/")
+            if route is None:
+                raise _RequestError(HTTPStatus.NOT_FOUND, f"unknown endpoint {url.path}")
+            content = route(query)
+        except _RequestError as e:
+            self._send_json(e.status, {"error": str(e), **e.extra})
+        except Exception as e:
+            # a bug, but the client should still get an answer
+            self.log_error("error handling %s: %s", self.path, traceback.format_exc())
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR,
+                            {"error": f"internal error: {type(e).__name__}: {e}"})
+        else:
+            self._send_json(HTTPStatus.OK, content)
+
+    def do_GET(self):
+        self._handle({"/health": self.health, "/lookup": self.lookup, "/search": self.search})
+
+    def do_POST(self):
+        self._handle({"/render": self.render})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise _RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request is too large")
+        try:
+            content = json.loads(self.rfile.read(length).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, f"invalid JSON: {e}") from None
+        if not isinstance(content, dict):
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "expected a JSON object")
+        return content
+
+    def health(self, query: dict) -> dict:
+        database = get_database()
+        return {"database": database.filename, "known_authors": len(database.data),
+                "generation": database.generation}
+
+    def lookup(self, query: dict) -> dict:
+        name = query.get("name", "").strip()
+        if name == "":
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "missing 'name'")
+        database = get_database()
+        names = database.derived("names", _known_names)
+        match = names.resolve(name)
+        if match is None or match[0] is None:
+            closest = [found for found, _ in author_index().search(name, 1)]
+            raise _RequestError(HTTPStatus.NOT_FOUND, f'author "{name}" is not known',
+                                closest=closest[0] if closest else None)
+        known_name, rule = match
+        return {"query": name, "name": known_name, "rule": rule,
+                "data": database.data[known_name]}
+
+    def search(self, query: dict) -> dict:
+        q = query.get("q", "").strip()
+        if q == "":
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "missing 'q'")
+        try:
+            k = int(query.get("k", 5))
+        except ValueError:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, "'k' should be an integer") from None
+        results = author_index().search(q, max(1, min(k, 100)))
+        return {"query": q, "results": [{"name": name, "score": score}
+                                        for name, score in results]}
+
+    def render(self, query: dict) -> dict:
+        content = self._read_json()
+        names = content.get("authors")
+        if isinstance(names, str):
+            names = names.splitlines()
+        if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+            raise _RequestError(HTTPStatus.BAD_REQUEST,
+                                "'authors' should be a list of names or a string")
+        journals = content.get("journals", ["aanda"])
+        options = content.get("options", {})
+        if not isinstance(journals, list) or not all(isinstance(j, str) for j in journals) \
+                or not isinstance(options, dict):
+            raise _RequestError(HTTPStatus.BAD_REQUEST,
+                                "'journals' should be a list and 'options' an object")
+        _check_options(options)
+        try:
+            authors = Authors.from_list(names, warn_unknown=False)
+            texts = authors.render_all(journals, **options)
+        except (ValueError, TypeError) as e:
+            raise _RequestError(HTTPStatus.BAD_REQUEST, str(e)) from None
+        return {"texts": texts, "unknown": authors.unknown_authors}
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000, quiet: bool = False) -> ThreadingHTTPServer:
+    """Create the server (call `serve_forever` on it to start)
+
+    Args:
+        host (str, optional):
+            The address to listen on. By default, only local connections.
+        port (int, optional):
+            The port (0 to choose a free one)
+        quiet (bool, optional):
+            Whether to stop logging each request
+    """
+    handler = type("Handler", (AuthorsRequestHandler,), {"quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, quiet: bool = False):
+    """Serve the rendering endpoints until interrupted with Ctrl+C
+
+    The database is loaded once and kept in memory, and read again
+    automatically when it changes on disk. All the endpoints answer with JSON:
+
+        GET  /health                  the number of known authors
+        GET  /lookup?name=J. Doe      the known author matching a name
+        GET  /search?q=jon smth&k=5   the known authors with the closest names
+        POST /render                  the LaTeX for one or more journals
+
+    The body of /render is like `{"authors": ["A. Author", "B. Author"],
+    "journals": ["aanda", "mnras"], "options": {"alphabetical": true}}`,
+    where "authors" can also be a string with one name per line and the
+    "options" are passed to `Authors.render_all`.
+
+    See `make_server` for the arguments.
+    """
+    database = get_database()
+    database.derived("names", _known_names)
+    author_index()
+    server = make_server(host, port, quiet)
+    print(f"serving {len(database.data)} known authors on "
+          f"http://{server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,280 @@
+import os
+import sqlite3
+from contextlib import closing
+from typing import Iterable, List, Union
+
+from yaml import safe_load as load, safe_dump as dump
+
+from .utils import name_to_last, name_to_initials_last, strip_accents
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL,
+    last_key TEXT NOT NULL,
+    initials_last_key TEXT NOT NULL,
+    email TEXT,
+    orcid TEXT,
+    spelling TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS authors_name_key ON authors (name_key);
+CREATE INDEX IF NOT EXISTS authors_last_key ON authors (last_key);
+CREATE INDEX IF NOT EXISTS authors_initials_last_key ON authors (initials_last_key);
+CREATE TABLE IF NOT EXISTS affiliations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS author_affiliations (
+    author_id INTEGER NOT NULL REFERENCES authors (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    affiliation_id INTEGER REFERENCES affiliations (id),
+    raw TEXT,
+    PRIMARY KEY (author_id, position)
+);
+CREATE INDEX IF NOT EXISTS author_affiliations_affiliation
+    ON author_affiliations (affiliation_id);
+CREATE TABLE IF NOT EXISTS labels (
+    author_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    PRIMARY KEY (author_id, position),
+    FOREIGN KEY (author_id, position)
+        REFERENCES author_affiliations (author_id, position) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS labels_label ON labels (label);
+CREATE TABLE IF NOT EXISTS nicknames (
+    author_id INTEGER PRIMARY KEY REFERENCES authors (id) ON DELETE CASCADE,
+    nickname TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nicknames_nickname ON nicknames (nickname);
+CREATE TABLE IF NOT EXISTS acknowledgements (
+    author_id INTEGER PRIMARY KEY REFERENCES authors (id) ON DELETE CASCADE,
+    text TEXT NOT NULL
+);
+"""
+
+# fields of each author which have their own column or table
+_COLUMNS = ("email", "orcid", "spelling")
+_TABLES = ("nickname", "acknowledgements")
+
+
+def _name_keys(name: str):
+    norm = strip_accents(name.casefold())
+    return norm, name_to_last(norm), name_to_initials_last(norm)
+
+
+def _is_labelled(aff) -> bool:
+    """ Whether `aff` is an affiliation in the form {affiliation: {'label': label}} """
+    if not isinstance(aff, dict) or len(aff) != 1:
+        return False
+    key, value = list(aff.items())[0]
+    return (isinstance(key, str) and isinstance(value, dict)
+            and list(value) == ["label"] and isinstance(value["label"], str))
+
+
+class SQLiteBackend:
+    """Store the database of known authors in an SQLite database
+
+    Authors, affiliations, labels, nicknames and acknowledgements are kept in
+    separate tables, with indexes on the normalized (casefolded, without
+    accents) names, last names and initials. Any other information about the
+    authors is kept as YAML, so that converting from and to the YAML format
+    (with `import_yaml` and `export_yaml`) does not lose anything, as long as
+    every author has a list of affiliations.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+
+    def __repr__(self):
+        return f"SQLiteBackend({self.filename!r})"
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.filename)
+        connection.execute("PRAGMA foreign_keys = ON")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def signature(self):
+        """ Changes whenever the database is written """
+        if not os.path.exists(self.filename):
+            raise FileNotFoundError(self.filename)
+        with closing(self.connect()) as connection:
+            row = connection.execute(
+                "SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return 0 if row is None else row[0]
+
+    def load(self) -> dict:
+        if not os.path.exists(self.filename):
+            raise FileNotFoundError(self.filename)
+        with closing(self.connect()) as connection:
+            authors = {}
+            records = {}
+            query = "SELECT id, name, email, orcid, spelling, extra FROM authors ORDER BY name"
+            for id, name, email, orcid, spelling, extra in connection.execute(query):
+                data = {"affiliations": []}
+                for key, value in zip(_COLUMNS, (email, orcid, spelling)):
+                    if value is not None:
+                        data[key] = value
+                if extra is not None:
+                    data.update(load(extra))
+                authors[name] = data
+                records[id] = data
+
+            query = """
+                SELECT aa.author_id, aa.raw, affiliations.name, labels.label
+                FROM author_affiliations AS aa
+                LEFT JOIN affiliations ON affiliations.id = aa.affiliation_id
+                LEFT JOIN labels
+                    ON labels.author_id = aa.author_id AND labels.position = aa.position
+                ORDER BY aa.author_id, aa.position
+            """
+            for author_id, raw, affiliation, label in connection.execute(query):
+                if raw is not None:
+                    affiliation = load(raw)
+                elif label is not None:
+                    affiliation = {affiliation: {"label": label}}
+                records[author_id]["affiliations"].append(affiliation)
+
+            for author_id, nickname in connection.execute(
+                    "SELECT author_id, nickname FROM nicknames"):
+                records[author_id]["nickname"] = nickname
+            for author_id, text in connection.execute(
+                    "SELECT author_id, text FROM acknowledgements"):
+                records[author_id]["acknowledgements"] = text
+
+        return authors
+
+    def _insert(self, connection: sqlite3.Connection, name: str, data: dict,
+                affiliation_ids: dict):
+        columns = {}
+        extra = {}
+        for key, value in data.items():
+            if key in _COLUMNS + _TABLES and isinstance(value, str):
+                columns[key] = value
+            elif key == "affiliations" and isinstance(value, list):
+                continue
+            else:
+                extra[key] = value
+
+        author_id = connection.execute(
+            """INSERT INTO authors
+               (name, name_key, last_key, initials_last_key, email, orcid, spelling, extra)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            (name, *_name_keys(name), *[columns.get(key) for key in _COLUMNS],
+             dump(extra, allow_unicode=True) if extra else None),
+        ).lastrowid
+
+        if "nickname" in columns:
+            connection.execute("INSERT INTO nicknames VALUES (?, ?)",
+                               (author_id, columns["nickname"]))
+        if "acknowledgements" in columns:
+            connection.execute("INSERT INTO acknowledgements VALUES (?, ?)",
+                               (author_id, columns["acknowledgements"]))
+
+        if "affiliations" in extra:
+            return
+        for position, aff in enumerate(data.get("affiliations", [])):
+            label = None
+            if isinstance(aff, str):
+                affiliation = aff
+            elif _is_labelled(aff):
+                affiliation = list(aff.keys())[0]
+                label = aff[affiliation]["label"]
+            else:
+                connection.execute(
+                    "INSERT INTO author_affiliations VALUES (?, ?, NULL, ?)",
+                    (author_id, position, dump(aff, allow_unicode=True)))
+                continue
+            if affiliation not in affiliation_ids:
+                connection.execute("INSERT OR IGNORE INTO affiliations (name) VALUES (?)",
+                                   (affiliation,))
+                affiliation_ids[affiliation] = connection.execute(
+                    "SELECT id FROM affiliations WHERE name = ?", (affiliation,)
+                ).fetchone()[0]
+            connection.execute(
+                "INSERT INTO author_affiliations VALUES (?, ?, ?, NULL)",
+                (author_id, position, affiliation_ids[affiliation]))
+            if label is not None:
+                connection.execute("INSERT INTO labels VALUES (?, ?, ?)",
+                                   (author_id, position, label))
+
+    def save(self, data: dict, changed: Union[Iterable[str], None] = None):
+        """Write `data` to the database
+
+        Args:
+            data (dict):
+                Dictionary with information about the known authors
+            changed (iterable, optional):
+                Names of the authors that were added, changed or removed. If
+                provided, only these authors are written, otherwise the whole
+                database is replaced.
+        """
+        with closing(self.connect()) as connection:
+            with connection:
+                affiliation_ids = {}
+                if changed is None:
+                    connection.execute("DELETE FROM authors")
+                    names = list(data)
+                else:
+                    names = list(changed)
+                    connection.executemany("DELETE FROM authors WHERE name = ?",
+                                           [(name,) for name in names])
+                for name in names:
+                    if name in data:
+                        self._insert(connection, name, data[name], affiliation_ids)
+                connection.execute(
+                    """DELETE FROM affiliations WHERE id NOT IN
+                       (SELECT affiliation_id FROM author_affiliations
+                        WHERE affiliation_id IS NOT NULL)""")
+                connection.execute(
+                    """INSERT INTO meta VALUES ('generation', 1)
+                       ON CONFLICT (key) DO UPDATE SET value = value + 1""")
+
+    def find(self, name: str) -> List[str]:
+        """Find the known authors whose name, last name, initials and last name
+        or nickname match `name`, ignoring case and accents, using the indexes
+        of the database"""
+        norm, last, initials_last = _name_keys(name)
+        with closing(self.connect()) as connection:
+            rows = connection.execute(
+                """SELECT name FROM authors
+                   WHERE name_key = ? OR last_key = ? OR initials_last_key = ?
+                   UNION
+                   SELECT authors.name FROM nicknames
+                   JOIN authors ON authors.id = nicknames.author_id
+                   WHERE nicknames.nickname = ?
+                   ORDER BY name""",
+                (norm, norm, initials_last, name),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+
+def import_yaml(yaml_file: str, sqlite_file: str):
+    """Import the authors in a YAML file into an SQLite database, replacing
+    any authors already there
+
+    Args:
+        yaml_file (str): Path to the YAML file
+        sqlite_file (str): Path to the SQLite database (created if needed)
+    """
+    from .database import load_known_authors
+    SQLiteBackend(sqlite_file).save(load_known_authors(yaml_file))
+
+
+def export_yaml(sqlite_file: str, yaml_file: str):
+    """Export the authors in an SQLite database to a YAML file, in the same
+    format as the default database
+
+    Args:
+        sqlite_file (str): Path to the SQLite database
+        yaml_file (str): Path to the YAML file (overwritten if it exists)
+    """
+    from .database import dump_known_authors
+    dump_known_authors(yaml_file, SQLiteBackend(sqlite_file).load())
@@ -1,5 +1,9 @@
+import os
 import re
-from functools import lru_cache
+import sys
+from collections import Counter, defaultdict
+import heapq
+from typing import Iterable, List, Tuple, Union
 import unicodedata
 
 
@@ -25,34 +29,236 @@ def argsort(seq):
     return sorted(range(len(seq)), key=seq.__getitem__)
 
 
-def lev_dist(a: str, b: str) -> float:
+def lev_dist(a: str, b: str, max_dist: int = None) -> int:
     """
     Calculates the Levenshtein distance between two input strings `a` and `b`
 
     Args:
         a,b (str) : The two strings to be compared
+        max_dist (int, optional) :
+            If provided, stop as soon as the distance is known to be larger
+            than `max_dist`, and return `max_dist + 1`.
 
     Returns:
-        The Levenshtein distance between string `a` and `b`.
+        The Levenshtein distance between string `a` and `b`, or `max_dist + 1`
+        if the distance is larger than `max_dist`.
 
     Examples:
         >>> lev_dist('stamp', 'stomp')
-        1.0
+        1
+        >>> lev_dist('stamp', 'stomps', max_dist=1)
+        2
     """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    n = len(b)
+
+    if max_dist is None:
+        # iterative version, keeping only two rows of the table
+        previous = list(range(n + 1))
+        for i, ca in enumerate(a, 1):
+            current = [i]
+            for j, cb in enumerate(b, 1):
+                current.append(min(previous[j] + 1,           # delete character
+                                   current[j - 1] + 1,        # insert character
+                                   previous[j - 1] + (ca != cb)))  # replace character
+            previous = current
+        return previous[n]
+
+    if len(a) - n > max_dist:
+        return max_dist + 1
+
+    # only cells within max_dist of the diagonal can have distances <= max_dist
+    k = max_dist
+    too_far = k + 1
+    previous = [j if j <= k else too_far for j in range(n + 1)]
+    for i, ca in enumerate(a, 1):
+        current = [too_far] * (n + 1)
+        if i <= k:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - k), min(n, i + k) + 1):
+            d = min(previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (ca != b[j - 1]))
+            if d > k:
+                d = too_far
+            elif d < row_min:
+                row_min = d
+            current[j] = d
+        if row_min > k:
+            return too_far
+        previous = current
+    return previous[n]
+
+
+def lev_dist_many(a: str, bs: List[str], max_dist: int = None) -> List[int]:
+    """
+    Calculates the Levenshtein distance between `a` and each string in `bs`
+
+    Args:
+        a (str) : The string to be compared
+        bs (list) : The strings to compare `a` with
+        max_dist (int, optional) : See `lev_dist`
+
+    Returns:
+        List with the Levenshtein distances
+    """
+    return [lev_dist(a, b, max_dist) for b in bs]
+
+
+def _max_similar_dist(total: int, threshold: float) -> int:
+    """ Largest distance `d` for which 1 - 2 * d / total > threshold, or -1 """
+    if total == 0:
+        return -1
+    d = int(total * (1 - threshold) / 2) + 1
+    while d >= 0 and not 1 - 2 * d / total > threshold:
+        d -= 1
+    return d
+
 
-    @lru_cache(None)  # for memorization
-    def min_dist(s1, s2):
-        if s1 == len(a) or s2 == len(b):
-            return len(a) - s1 + len(b) - s2
-        # no change required
-        if a[s1] == b[s2]:
-            return min_dist(s1 + 1, s2 + 1)
-        return 1 + min(
-            min_dist(s1, s2 + 1),      # insert character
-            min_dist(s1 + 1, s2),      # delete character
-            min_dist(s1 + 1, s2 + 1),  # replace character
-        )
-    return min_dist(0, 0)
+def _qgrams(s: str, q: int) -> List[tuple]:
+    """ The q-grams of `s`, numbered to distinguish repeated ones """
+    seen = Counter()
+    grams = []
+    for i in range(len(s) - q + 1):
+        gram = s[i:i + q]
+        seen[gram] += 1
+        grams.append((gram, seen[gram]))
+    return grams
+
+
+_similar_worker_state = {}
+
+
+def _init_similar_worker(strings: List[str], threshold: float):
+    _similar_worker_state["strings"] = strings
+    _similar_worker_state["threshold"] = threshold
+
+
+def _verify_similar(pairs: List[tuple], strings: List[str] = None,
+                    threshold: float = None) -> List[tuple]:
+    """ Calculate the distances for candidate pairs `(i, j, max_dist)` and
+    keep the similar ones """
+    if strings is None:
+        strings = _similar_worker_state["strings"]
+        threshold = _similar_worker_state["threshold"]
+    similar = []
+    for i, j, max_dist in pairs:
+        dist = lev_dist(strings[i], strings[j], max_dist=max_dist)
+        prob = 1 - 2 * dist / (len(strings[i]) + len(strings[j]))
+        if prob > threshold:
+            similar.append((i, j, dist, prob))
+    return similar
+
+
+def similar_pairs(strings: List[str], threshold: float = 0.7, q: int = 2,
+                  workers: int = None) -> List[tuple]:
+    """
+    Find all pairs of similar strings, with similarity above `threshold`
+
+    The similarity between two strings `a` and `b` is defined as
+    `1 - 2 * lev_dist(a, b) / (len(a) + len(b))`. Instead of calculating the
+    distance for every pair of strings, candidate pairs are selected first
+    using an inverted index of the (rarest) q-grams of each string. If two
+    strings have a distance `d`, they share at least
+    `max(len(a), len(b)) - q + 1 - q * d` q-grams, so this selection is exact:
+    the result is the same as comparing every pair.
+
+    Args:
+        strings (List[str]): The strings to compare
+        threshold (float, optional): The similarity threshold
+        q (int, optional): The length of the q-grams
+        workers (int, optional):
+            If larger than 1, calculate the distances for the candidate pairs
+            in this number of processes. The result does not depend on it.
+
+    Returns:
+        List of tuples `(i, j, dist, prob)` with `i < j` the indices of the
+        similar strings, their Levenshtein distance and similarity, sorted by
+        `i` and `j`
+    """
+    n = len(strings)
+    lengths = [len(s) for s in strings]
+
+    grams = [_qgrams(s, q) for s in strings]
+    gram_sets = [set(g) for g in grams]
+    frequency = Counter(gram for g in grams for gram in g)
+
+    max_dists = {}
+
+    def max_dist(total):
+        if total not in max_dists:
+            max_dists[total] = _max_similar_dist(total, threshold)
+        return max_dists[total]
+
+    candidates = []
+
+    def compare(i, j):
+        total = lengths[i] + lengths[j]
+        d = max_dist(total)
+        if abs(lengths[i] - lengths[j]) > d:
+            return
+        need = max(lengths[i], lengths[j]) - q + 1 - q * d
+        if need > 0 and len(gram_sets[i] & gram_sets[j]) < need:
+            return
+        candidates.append((min(i, j), max(i, j), d))
+
+    # largest distance allowed between a string of length `length` and any
+    # other string that passes the length filter (longer strings are allowed
+    # larger distances, and then need fewer q-grams in common)
+    all_lengths = sorted(set(lengths))
+    partner_dists = {}
+
+    def partner_dist(length):
+        if length not in partner_dists:
+            partner_dists[length] = max(
+                [max_dist(length + other) for other in all_lengths
+                 if abs(length - other) <= max_dist(length + other)],
+                default=max_dist(2 * length))
+        return partner_dists[length]
+
+    # strings whose q-grams, sorted from rarest to most common, are indexed
+    # by their prefix. The length of the prefix is such that similar strings
+    # always share at least one q-gram in their prefixes
+    index = defaultdict(list)
+    short = []
+    for i, g in enumerate(grams):
+        need = len(g) - q * partner_dist(lengths[i])
+        if need <= 0:
+            short.append(i)
+            continue
+        g.sort(key=lambda gram: (frequency[gram], gram))
+        in_prefix = set()
+        for gram in g[:len(g) - need + 1]:
+            in_prefix.update(index[gram])
+            index[gram].append(i)
+        for j in in_prefix:
+            compare(j, i)
+
+    # strings that are too short for the q-gram filter are compared with all
+    is_short = set(short)
+    for i in short:
+        for j in range(n):
+            if j != i and (j not in is_short or j < i):
+                compare(j, i)
+
+    # the expensive part, calculating distances, can run in parallel
+    if workers is None or workers <= 1 or len(candidates) == 0:
+        pairs = _verify_similar(candidates, strings, threshold)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        size = -(-len(candidates) // (4 * workers))
+        chunks = [candidates[k:k + size] for k in range(0, len(candidates), size)]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_similar_worker,
+                                 initargs=(strings, threshold)) as executor:
+            pairs = [pair for chunk in executor.map(_verify_similar, chunks)
+                     for pair in chunk]
+
+    pairs.sort()
+    return pairs
 
 
 def bitapSearch(haystack, needle, maxErrors):
@@ -67,83 +273,197 @@ def bitapSearch(haystack, needle, maxErrors):
     Return approximately place of needle in haystack and number of alterations.
     If needle can't find with maxErrors alterations, return tuple of empty string and -1.
     """
-    haystackLen = len(haystack)
-    needleLen = len(needle)
+    return FuzzyMatcher(needle).search(haystack, maxErrors)
 
-    def _generateAlphabet(needle, haystack):
-        """Genarating mask for each letter in haystack.
-        This mask shows presence letter in needle.
-        """
-        alphabet = {}
-        for letter in haystack:
-            if letter not in alphabet:
-                letterPositionInNeedle = 0
-                for symbol in needle:
-                    letterPositionInNeedle = letterPositionInNeedle << 1
-                    letterPositionInNeedle |= int(letter != symbol)
-                alphabet[letter] = letterPositionInNeedle
-        return alphabet
-
-    alphabet = _generateAlphabet(needle, haystack)
-
-    table = [] # first index - over k (errors count, numeration starts from 1), second - over columns (letters of haystack)
-    emptyColumn = (2 << (needleLen - 1)) - 1
-
-    #   Generate underground level of table
-    underground = []
-    [underground.append(emptyColumn) for i in range(haystackLen + 1)]
-    table.append(underground)
-    # _printTable(table[0], needleLen)
-
-    #   Execute precise matching
-    k = 1
-    table.append([emptyColumn])
-    for columnNum in range(1, haystackLen + 1):
-        prevColumn = (table[k][columnNum - 1]) >> 1
-        letterPattern = alphabet[haystack[columnNum - 1]]
-        curColumn = prevColumn | letterPattern
-        table[k].append(curColumn)
-        if (curColumn & 0x1) == 0:
-            place = haystack[columnNum - needleLen : columnNum]
-            return (place, k - 1)
-    # _printTable(table[k], needleLen)
-
-    #   Execute fuzzy searching with calculation Levenshtein distance
-    for k in range(2, maxErrors + 2):
-        # print("Errors =", k - 1)
-        table.append([emptyColumn])
 
+class FuzzyMatcher:
+    """Bit-parallel fuzzy matcher for a fixed needle
+
+    Implements the same search as `bitapSearch` (Shift-Or with the Wu-Manber
+    modifications), but the bit masks of the needle are built once, and the
+    haystack is scanned one letter at a time, keeping only the previous
+    column of each error level. Levels above the lowest one that already
+    matched are not computed anymore.
+
+    Args:
+        needle (str): The pattern to search for
+    """
+
+    def __init__(self, needle: str):
+        self.needle = needle
+        length = len(needle)
+        self._empty = (2 << (length - 1)) - 1
+        self._masks = {}
+        for position, symbol in enumerate(needle):
+            bit = 1 << (length - 1 - position)
+            self._masks[symbol] = self._masks.get(symbol, self._empty) & ~bit
+
+    def search(self, haystack: str, maxErrors: int) -> Tuple[str, int]:
+        """Search the needle in `haystack` with at most `maxErrors` alterations
+
+        Returns:
+            The approximate place of the needle in `haystack` and the number of
+            alterations, or `("", -1)` if it was not found.
+        """
+        needleLen = len(self.needle)
+        haystackLen = len(haystack)
+        empty = self._empty
+        masks = self._masks
+
+        top = maxErrors + 1  # highest error level (plus one) still needed
+        previous = [empty] * max(top + 1, 2)
+        current = [empty] * max(top + 1, 2)
+        found = None
         for columnNum in range(1, haystackLen + 1):
-            prevColumn = (table[k][columnNum - 1]) >> 1
-            letterPattern = alphabet[haystack[columnNum - 1]]
-            curColumn = prevColumn | letterPattern
-            
-            insertColumn = curColumn & (table[k - 1][columnNum - 1])
-            deleteColumn = curColumn & (table[k - 1][columnNum] >> 1)
-            replaceColumn = curColumn & (table[k - 1][columnNum - 1] >> 1)
-            resColumn = insertColumn & deleteColumn & replaceColumn
-            
-            table[k].append(resColumn)
-            if (resColumn & 0x1) == 0:
-                startPos = max(0, columnNum - needleLen - 1) # taking in account Replace operation
-                endPos = min(columnNum + 1, haystackLen) # taking in account Replace operation
-                place = haystack[startPos : endPos]
-                return (place, k - 1)
-            
-        # _printTable(table[k], needleLen)
-    return ("", -1)
+            letterPattern = masks.get(haystack[columnNum - 1], empty)
+            # precise matching
+            column = (previous[1] >> 1) | letterPattern
+            if (column & 0x1) == 0:
+                return (haystack[columnNum - needleLen:columnNum], 0)
+            current[1] = column
+            # fuzzy matching, insert & delete & replace
+            for k in range(2, top + 1):
+                below = previous[k - 1]
+                column = ((previous[k] >> 1) | letterPattern) & below \
+                    & (current[k - 1] >> 1) & (below >> 1)
+                current[k] = column
+                if (column & 0x1) == 0:
+                    found = (k, columnNum)
+                    top = k - 1
+                    break
+            previous, current = current, previous
+
+        if found is None:
+            return ("", -1)
+        k, columnNum = found
+        startPos = max(0, columnNum - needleLen - 1)  # taking in account Replace operation
+        endPos = min(columnNum + 1, haystackLen)  # taking in account Replace operation
+        return (haystack[startPos:endPos], k - 1)
+
+
+def search_many(needle: str, haystacks: Iterable[str],
+                maxErrors: Union[int, None] = None) -> List[Tuple[str, int]]:
+    """Search `needle` in each of the `haystacks`, as with `bitapSearch`
+
+    Args:
+        needle (str): The pattern to search for
+        haystacks (Iterable[str]): The strings to search in
+        maxErrors (int, optional):
+            Maximum number of alterations. By default, the length of each
+            haystack.
+
+    Returns:
+        List with the result of the search in each haystack
+    """
+    matcher = FuzzyMatcher(needle)
+    if maxErrors is None:
+        return [matcher.search(haystack, len(haystack)) for haystack in haystacks]
+    return [matcher.search(haystack, maxErrors) for haystack in haystacks]
+
+
+class TrigramIndex:
+    """Inverted index of the character trigrams in a list of names
+
+    Names are casefolded and the accents are removed before splitting them
+    into trigrams (padded with spaces, so that short names and the start of
+    each name also count). `search` ranks the names by the Dice coefficient
+    between their set of trigrams and those of the query. It goes through the
+    trigrams of the query from the rarest, and stops as soon as no name that
+    was not seen yet could score higher than the current results.
+
+    Args:
+        names (Iterable[str]): The names to index
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names = list(names)
+        self._postings = defaultdict(list)
+        self._trigrams = []
+        for i, name in enumerate(self.names):
+            grams = self.trigrams(name)
+            self._trigrams.append(grams)
+            for gram in grams:
+                self._postings[gram].append(i)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def trigrams(name: str) -> frozenset:
+        name = '  ' + ' '.join(strip_accents(name.casefold()).split()) + ' '
+        return frozenset(name[i:i + 3] for i in range(len(name) - 2))
+
+    def search(self, query: str, k: int = 1) -> List[Tuple[str, float]]:
+        """Find the names most similar to `query`
+
+        Args:
+            query (str): The name to search for
+            k (int, optional): Maximum number of results
+
+        Returns:
+            List of tuples `(name, score)`, sorted from the most similar, with
+            `score` between 0 and 1. Names with no trigrams in common with
+            `query` are never returned.
+        """
+        grams = self.trigrams(query)
+        n = len(grams)
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        trigrams = self._trigrams
+        seen = set()
+        best = []  # heap with the k best (score, -index)
+        for used, indices in enumerate(postings, start=1):
+            for i in indices:
+                if i in seen:
+                    continue
+                seen.add(i)
+                other = trigrams[i]
+                item = (2 * len(grams & other) / (n + len(other)), -i)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item > best[0]:
+                    heapq.heapreplace(best, item)
+            # names not seen yet share at most n - used trigrams with the query
+            left = n - used
+            if len(best) == k and best[0][0] > 2 * left / (n + left):
+                break
+        best.sort(reverse=True)
+        return [(self.names[-i], score) for score, i in best]
 
 
 def closest_author(author, authors, closest=1, distance='within'):
+    """Find the closest matches to `author` in a list of names
+
+    Args:
+        author (str): The name to search for
+        authors (list or TrigramIndex): The known names
+        closest (int, optional): Number of matches to return
+        distance (str, optional):
+            'within' returns the names that contain `author`, if any, and
+            otherwise falls back to 'trigram', which ranks the names with a
+            `TrigramIndex` (built on the fly if `authors` is a list). 'bitap'
+            compares `author` with every name using `bitapSearch`.
+    """
+    index = authors if isinstance(authors, TrigramIndex) else None
+    if index is not None:
+        authors = index.names
+
     if distance == 'within':
         within = [authors_i for authors_i in authors if author.casefold() in authors_i.casefold()]
         if len(within) > 0:
             return within[:closest]
         else:
-            distance = 'bitap'
+            distance = 'trigram'
+
+    if distance == 'trigram':
+        if index is None:
+            index = TrigramIndex(authors)
+        found = [name for name, _ in index.search(author, closest)]
+        if len(found) > 0:
+            return found
+        distance = 'bitap'
 
     if distance == 'bitap':
-        d = [bitapSearch(a, author, len(a))[1] for a in authors]
+        d = [errors for _, errors in search_many(author, authors)]
         return [authors[i] for i in argsort(d)[:closest]]
 
 
@@ -229,69 +549,143 @@ def text_replace_dict(text, convert):
     return regex.sub(lambda match: convert[match.group()], text)
 
 
+_TEX_ESCAPE = str.maketrans({
+    '&': r'\&',
+    '|': r'$\|$',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+    # '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+})
+
+
 def tex_escape(text):
     """ Escape `text` so it appears correctly in LaTeX """
-    conv = {
-        '&': r'\&',
-        '|': r'$\|$',
-        '%': r'\%',
-        '$': r'\$',
-        '#': r'\#',
-        '_': r'\_',
-        '{': r'\{',
-        '}': r'\}',
-        '~': r'\textasciitilde{}',
-        '^': r'\^{}',
-        # '\\': r'\textbackslash{}',
-        '<': r'\textless{}',
-        '>': r'\textgreater{}',
-    }
-    return text_replace_dict(text, conv)
+    return text.translate(_TEX_ESCAPE)
+
+
+def tex_escape_many(texts: Iterable[str]) -> List[str]:
+    """ Escape each of `texts` so they appear correctly in LaTeX """
+    return [text.translate(_TEX_ESCAPE) for text in texts]
+
+
+_TEX_DEESCAPE = {
+    # symbols
+    r"’": "'",
+    #
+    r"\'a": 'á', "\'a": 'á',
+    r"\`a": 'à', #r"\`a": 'à',
+    r"\~a": 'ã', #r"\~a": 'ã',
+    #
+    r"\'e": 'é', "\'e": 'é',
+    r"\´e": 'é',
+    r"\’e": 'é',
+    r"\`e": 'è', #r"\`e": 'è',
+    #
+    r"\'i": 'í', "\'i": 'í',
+    r"\`i": 'ì', #r"\`i": 'ì',
+    #
+    r"\'o": 'ó', "\'o": 'ó',
+    r"\`o": 'ò', #r"\`o": 'ò',
+    r"\"o": 'ö', "\"o": 'ö',
+    #
+    r"\'u": 'ú', "\'u": 'ú',
+    r"\'{u}": 'ú', "\'{u}": 'ú',
+    r"\`u": 'ù',
+    r"\`{u}": 'ù',
+    r'\"u': 'ü',
+    r'\"{u}': 'ü',
+    #
+    r"\~{n}": 'ñ',
+    #
+    r'\,': ' ',
+    r'\ ': ' ',
+    r'\&': '&',
+    r'${\rm \mid}$': '|',
+    r'{\rm \&}': '&',
+}
+
+# TeX accent commands and the corresponding combining characters
+_TEX_ACCENTS = {
+    "'": '́', '`': '̀', '^': '̂', '"': '̈', '~': '̃',
+    '=': '̄', '.': '̇', 'c': '̧', 'k': '̨', 'v': '̌',
+    'H': '̋', 'u': '̆', 'r': '̊',
+}
+
+# TeX commands for special letters, e.g. {\o}, \o{} or \o followed by a space
+_TEX_LETTERS = {
+    'o': 'ø', 'O': 'Ø', 'l': 'ł', 'L': 'Ł', 'ss': 'ß', 'aa': 'å', 'AA': 'Å',
+    'ae': 'æ', 'AE': 'Æ', 'oe': 'œ', 'OE': 'Œ', 'i': 'ı', 'j': 'ȷ',
+}
+
+
+def _tex_accented_letters():
+    """ All forms of \\'a, \\'{a}, {\\'a}, \\c{c}, \\c c, \\'\\i, ... for which
+    there is a single accented character """
+    import string
+    accented = {}
+    bases = [(letter, letter) for letter in string.ascii_letters]
+    bases += [(r'\i', 'ı'), (r'\j', 'ȷ')]
+    for command, combining in _TEX_ACCENTS.items():
+        for base, letter in bases:
+            if base in (r'\i', r'\j'):
+                letter = base[1]
+            character = unicodedata.normalize('NFC', letter + combining)
+            if len(character) != 1:
+                continue
+            forms = [f'\\{command}{{{base}}}']
+            if command.isalpha():
+                forms.append(f'\\{command} {base}')
+                if base.startswith('\\'):
+                    forms.append(f'\\{command}{base}')
+            else:
+                forms.append(f'\\{command}{base}')
+            for form in forms:
+                accented[form] = character
+                accented['{' + form + '}'] = character
+    return accented
+
+
+def _tex_deescape_regex():
+    convert = dict(_tex_accented_letters())
+    convert.update(_TEX_DEESCAPE)
+    keys = sorted(convert, key=lambda item: -len(item))
+    letters = '|'.join(sorted(_TEX_LETTERS, key=lambda item: -len(item)))
+    regex = re.compile('|'.join(re.escape(key) for key in keys)
+                       + rf'|\{{\\({letters})\}}|\\({letters})(?:\{{\}}| |(?![A-Za-z]))')
+
+    def replace(match):
+        letter = match.group(1) or match.group(2)
+        if letter is not None:
+            return _TEX_LETTERS[letter]
+        return convert[match.group()]
+
+    return regex, replace
+
+
+_TEX_DEESCAPE_REGEX, _tex_deescape_replace = _tex_deescape_regex()
 
 
 def tex_deescape(text):
     """ De-escape `text` from TeX characters """
-    conv = {
-        # symbols
-        r"’": "'",
-        #
-        r"\'a": 'á', "\'a": 'á',
-        r"\`a": 'à', #r"\`a": 'à',
-        r"\~a": 'ã', #r"\~a": 'ã',
-        #
-        r"\'e": 'é', "\'e": 'é',
-        r"\´e": 'é',
-        r"\’e": 'é',
-        r"\`e": 'è', #r"\`e": 'è',
-        #
-        r"\'i": 'í', "\'i": 'í',
-        r"\`i": 'ì', #r"\`i": 'ì',
-        #
-        r"\'o": 'ó', "\'o": 'ó',
-        r"\`o": 'ò', #r"\`o": 'ò',
-        r"\"o": 'ö', "\"o": 'ö',
-        #
-        r"\'u": 'ú', "\'u": 'ú',
-        r"\'{u}": 'ú', "\'{u}": 'ú',
-        r"\`u": 'ù',
-        r"\`{u}": 'ù',
-        r'\"u': 'ü',
-        r'\"{u}': 'ü',
-        #
-        r"\~{n}": 'ñ',
-        #
-        r'\,': ' ',
-        r'\ ': ' ',
-        r'\&': '&',
-        r'${\rm \mid}$': '|',
-        r'{\rm \&}': '&',
-    }
-    escaped = text_replace_dict(text, conv)
+    escaped = _TEX_DEESCAPE_REGEX.sub(_tex_deescape_replace, text)
     if "\\" in escaped:
         print(f'some characters not escaped: {escaped}')
     return escaped
 
 
+def tex_deescape_many(texts: Iterable[str]) -> List[str]:
+    """ De-escape each of `texts` from TeX characters """
+    return [tex_deescape(text) for text in texts]
+
+
 def substr_in_list(sub, lst):
     for i, item in enumerate(lst):
         if sub in item:
@@ -306,6 +700,20 @@ def fix_encoding_errors(file):
     with open(file, 'w', encoding='utf-8') as f:
         f.write(text)
 
+def user_cache_dir():
+    """ Directory where `authors` keeps its cache files. Can be set with the
+    `AUTHORS_CACHE_DIR` environment variable. """
+    if 'AUTHORS_CACHE_DIR' in os.environ:
+        return os.environ['AUTHORS_CACHE_DIR']
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME', os.path.expanduser('~/.cache'))
+    return os.path.join(base, 'authors')
+
+
 def humanize_yaml(file):
     import fileinput
     for line in fileinput.FileInput(file, inplace=True, encoding='utf-8'):
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import time
+from difflib import SequenceMatcher
+from typing import List
+
+from .authors import Authors
+from .database import get_database
+from .latex_pdf_utils import LatexError, continuous_preview, preview_source
+
+
+def read_author_list(file: str) -> List[str]:
+    """ Read the (non-empty) lines of an author list, as `Authors` does """
+    with open(file, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() != ""]
+
+
+def sync_author_list(authors: Authors, names: List[str]) -> int:
+    """Change the author list of `authors` into `names`, only adding,
+    removing or replacing the authors that changed
+
+    Returns:
+        changes (int): Number of authors added, removed or replaced
+    """
+    opcodes = SequenceMatcher(None, authors.all_authors, names, autojunk=False).get_opcodes()
+    changes = 0
+    # from the end, so that the positions of the earlier blocks stay valid
+    for tag, i1, i2, j1, j2 in reversed(opcodes):
+        if tag == "equal":
+            continue
+        common = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in range(common):
+            authors.replace(i1 + k, names[j1 + k])
+        for k in reversed(range(i1 + common, i2)):
+            authors.remove(k)
+        for k in range(j1 + common, j2):
+            authors.add(names[k], position=i1 + (k - j1))
+        changes += max(i2 - i1, j2 - j1)
+    return changes
+
+
+def _file_signature(file: str):
+    try:
+        stat = os.stat(file)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _database_signature(database):
+    try:
+        return database.backend.signature()
+    except OSError:
+        return None
+
+
+def watch(file: str, journal: str = "aanda", preview: bool = False, interval: float = 0.5):
+    """Render the author list in `file` again whenever it, or the database,
+    changes, until interrupted with Ctrl+C
+
+    The database and the resolved names are kept in memory, and only the
+    authors that changed are resolved again. With `preview`, the LaTeX
+    document is rewritten when the output changes, and `latexmk -pvc`
+    recompiles it. Errors, like a database saved half-written, are reported
+    and the watch goes on.
+
+    Args:
+        file (str):
+            The file with the author list
+        journal (str, optional):
+            The journal, 'aanda' or 'mnras'
+        preview (bool, optional):
+            Whether to compile (and show) a preview continuously
+        interval (float, optional):
+            How often to check the files for changes, in seconds
+    """
+    authors = Authors(file)
+    database = get_database()
+    signature = _file_signature(file)
+    build_dir = tempfile.mkdtemp(prefix="authors-watch-") if preview else None
+    latexmk = None
+    text = None
+    failed_signature = None
+
+    try:
+        while True:
+            try:
+                new_text = authors.render_all([journal])[journal]
+            except Exception as e:  # e.g. a database saved half-written
+                print(f"{time.strftime('%H:%M:%S')} could not render {file}: {e}")
+                new_text = text
+            if new_text != text:
+                text = new_text
+                if preview:
+                    try:
+                        longauth = len(authors.affiliation_model().institutes) > 20
+                        source, jobname, template_dir = preview_source(journal, text, longauth)
+                        tex = os.path.join(build_dir, f"{jobname}.tex")
+                        with open(tex + ".tmp", "w", encoding="utf-8") as f:
+                            f.write(source)
+                        os.replace(tex + ".tmp", tex)
+                        if latexmk is None:
+                            latexmk = continuous_preview(jobname, template_dir, build_dir)
+                        print(f"{time.strftime('%H:%M:%S')} updated {tex} "
+                              f"({len(authors.all_authors)} authors)")
+                    except LatexError as e:
+                        print(f"{e} Printing the LaTeX instead.")
+                        preview = False
+                        print(text)
+                    except Exception as e:
+                        print(f"{time.strftime('%H:%M:%S')} could not update the preview: {e!r}")
+                else:
+                    print(text)
+
+            # wait for the author list or the database to change
+            while True:
+                time.sleep(interval)
+                new_signature = _file_signature(file)
+                if new_signature is not None and new_signature != signature:
+                    signature = new_signature
+                    break
+                if database.is_stale():
+                    # only try again once the file changes again
+                    database_signature = _database_signature(database)
+                    if database_signature == failed_signature:
+                        continue
+                    try:
+                        database.reload()
+                    except Exception as e:
+                        failed_signature = database_signature
+                        print(f"{time.strftime('%H:%M:%S')} could not read the database: {e}")
+                        continue
+                    failed_signature = None
+                    break
+
+            # also after the database changes, in case the list could not be
+            # updated while the database was broken
+            try:
+                sync_author_list(authors, read_author_list(file))
+            except Exception as e:
+                print(f"{time.strftime('%H:%M:%S')} could not update {file}: {e}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if latexmk is not None:
+            latexmk.terminate()
+            latexmk.wait()
+        if build_dir is not None:
+            shutil.rmtree(build_dir, ignore_errors=True)
@@ -1,7 +1,31 @@
+import os
 import pytest
 from authors.authors import get_all_known_authors
 
 
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """ Use a temporary copy of a small database """
+    from authors.database import use_database
+    monkeypatch.setenv('AUTHORS_CACHE_DIR', str(tmp_path / 'cache'))
+    file = tmp_path / 'all_known_authors.yml'
+    file.write_text(
+        '\n'
+        'Jane Doe:\n'
+        '  affiliations:\n'
+        '  - Some institute:\n'
+        '      label: some\n'
+        '  email: jane@doe.com\n'
+        '\n'
+        'João P. Faria:\n'
+        '  affiliations:\n'
+        '  - Another institute\n'
+        '  - Some institute\n',
+        encoding='utf-8')
+    yield use_database(str(file))
+    use_database(None)
+
+
 def test_known_authors():
     aka = get_all_known_authors()
     assert len(aka) >= 1, 'should know at least one author'
@@ -10,3 +34,319 @@ def test_known_authors():
 def test_Faria():
     aka = get_all_known_authors()
     assert 'João P. Faria' in aka, 'this author should be known...'
+
+
+def test_Names():
+    from authors.authors import Names
+    names = Names(['João P. Faria', 'Jane {van der Berg}'], nicknames=['jpf'])
+    assert len(names) == 2
+    assert 'João P. Faria' in names
+    assert 'joao p. faria' in names
+    assert 'Faria' in names
+    assert 'J. P. Faria' in names
+    assert 'Joao Faria' in names
+    assert 'van der Berg' in names
+    assert 'jpf' in names
+    assert 'Someone Else' not in names
+
+
+def test_resolve():
+    from authors.authors import Names
+    names = Names(['João P. Faria', 'Jane Doe'], nicknames={'jd': 'Jane Doe'})
+    assert names.resolve('João P. Faria') == ('João P. Faria', 'name')
+    assert names.resolve('Faria') == ('João P. Faria', 'last name')
+    assert names.resolve('jd') == ('Jane Doe', 'nickname')
+    assert names.resolve('J. Doe') == ('Jane Doe', 'initials and last name')
+    assert names.resolve('Someone Else') is None
+
+
+def test_query_author():
+    from authors import Authors
+    authors = Authors('Faria\nSomeone Else', warn_unknown=False)
+    assert authors.known == [True, False]
+    assert authors.resolved['Faria'] == ('João P. Faria', 'last name')
+    name, data = authors.query_author('Faria')
+    assert name == 'João P. Faria'
+    assert 'affiliations' in data
+    with pytest.raises(ValueError):
+        authors.query_author('Someone Else')
+
+
+def test_render_all(database):
+    from authors import Authors
+    authors = Authors('Jane Doe\nJoão P. Faria\nSomeone Else', warn_unknown=False)
+    model = authors.affiliation_model()
+    assert model.institutes == ['Some institute', 'Another institute']
+    assert model.labels == ['some', None]
+    assert model.numbers == [[1], [2, 1], []]
+    assert authors.affiliation_model() is model
+    texts = authors.render_all(['aanda', 'mnras'])
+    assert texts['aanda'] == authors.AandA(show=False)
+    assert texts['mnras'] == authors.MNRAS(show=False)
+    with pytest.raises(ValueError):
+        authors.render_all(['nature'])
+
+
+def test_institutes_in_list(database):
+    from authors import Authors
+    import authors as package
+    authors = Authors('João P. Faria\nSomeone Else\nJane Doe', warn_unknown=False)
+    assert authors.institutes_in_list == ['Another institute', 'Some institute']
+    assert authors.numbers == [[1, 2], [2]]
+    matrix = authors.incidence
+    assert matrix.shape == (3, 2) and matrix.nnz == 3
+    assert matrix.institutes_of(0) == [0, 1] and matrix.institutes_of(1) == []
+    assert matrix.authors_of(1) == [0, 2]
+    assert (2, 1) in matrix and (2, 0) not in matrix
+    assert matrix.to_dense() == [[1, 1], [0, 0], [0, 1]]
+    assert authors.incidence is matrix, 'should be cached'
+    package.register_author('Someone Else', ['New institute'])
+    assert authors.institutes_in_list[-1] == 'New institute'
+    assert authors.known == [True, True, True]
+    with open(database.filename, 'w', encoding='utf-8') as f:
+        f.write('Jane Doe:\n  affiliations:\n  - Edited institute\n')
+    assert authors.institutes_in_list == ['Edited institute']
+    assert authors.known == [False, False, True]
+
+
+def test_edit_list(database):
+    from authors import Authors
+    authors = Authors('Jane Doe', warn_unknown=False)
+    authors.AandA(show=False)
+    authors.add('João P. Faria')
+    authors.add('Someone Else', position=0)
+    authors.move('Jane Doe', 0)
+    authors.replace(1, 'Faria')
+    authors.remove('João P. Faria')
+    authors.add('Other Person')
+    expected = Authors('Jane Doe\nFaria\nOther Person', warn_unknown=False)
+    assert authors.all_authors == expected.all_authors
+    assert authors.known == [True, True, False]
+    assert authors.last_names == expected.last_names
+    assert authors.resolved == expected.resolved
+    assert authors.AandA(show=False) == expected.AandA(show=False)
+    assert authors.MNRAS(show=False, alphabetical=True) == expected.MNRAS(show=False, alphabetical=True)
+    with pytest.raises(ValueError):
+        authors.remove('Nobody')
+    with pytest.raises(IndexError):
+        authors.move(5, 0)
+
+
+def test_alphabetical(database):
+    from authors import Authors
+    from authors.ordering import collation_key, alphabetical_order
+    assert collation_key('Jane {van der Berg}') == ('berg', 'van der')
+    assert collation_key('Ludwig van Beethoven') == ('beethoven', 'van')
+    assert collation_key('Jean-Claude Van Damme') == ('damme', '')
+    assert collation_key('Ángel Ørsted') == ('orsted', '')
+    keys = ['d', 'c', 'b', 'a', 'b']
+    groups = [2, 4]
+    assert alphabetical_order(keys, 1) == [0, 3, 2, 4, 1]
+    assert alphabetical_order(keys, alphabetical_groups=groups) == [0, 1, 3, 2, 4]
+    assert groups == [2, 4], 'should not modify the groups'
+    authors = Authors('Zed Last\nÉmile Zola\nJane {van der Berg}\nFaria\nAdam Ábel',
+                      warn_unknown=False)
+    assert authors.author_order(True) == [0, 4, 2, 3, 1]
+    groups = [2]
+    authors.AandA(show=False, alphabetical=True, alphabetical_groups=groups)
+    authors.AandA(show=False, alphabetical=True, alphabetical_groups=groups)
+    assert groups == [2]
+
+
+def test_stream(database):
+    import io
+    from authors import Authors
+    authors = Authors('Jane Doe\nJoão P. Faria\nSomeone Else', warn_unknown=False)
+    chunks = list(authors.iter_AandA(alphabetical=True))
+    assert len(chunks) > 3
+    assert ''.join(chunks) == authors.AandA(show=False, alphabetical=True)
+    assert ''.join(authors.iter_MNRAS(line_breaks=2)) == authors.MNRAS(show=False, line_breaks=2)
+    stream = io.StringIO()
+    authors.write(stream, 'mnras')
+    assert stream.getvalue() == authors.MNRAS(show=False)
+    with pytest.raises(ValueError):
+        authors.write(stream, 'nature')
+
+
+def test_sync_author_list(database):
+    from authors import Authors
+    from authors.watch import sync_author_list
+    authors = Authors('Jane Doe\nA B\nC D\nE F', warn_unknown=False)
+    new = ['G H', 'Jane Doe', 'C D', 'I J', 'K L', 'João P. Faria']
+    assert sync_author_list(authors, new) == 5
+    expected = Authors('\n'.join(new), warn_unknown=False)
+    assert authors.all_authors == new
+    assert authors.known == expected.known
+    assert authors.AandA(show=False) == expected.AandA(show=False)
+
+
+def test_batch(database, tmp_path):
+    from authors import Authors
+    from authors.batch import batch, summary
+    files = []
+    for i, text in enumerate(['Jane Doe\nJoão P. Faria', 'Faria\nSomeone Else', '']):
+        files.append(tmp_path / f'list{i}.txt')
+        files[-1].write_text(text, encoding='utf-8')
+    out_dir = tmp_path / 'build'
+    files.append(tmp_path / 'missing.txt')
+    results = batch([str(f) for f in files], ['aanda', 'mnras'], str(out_dir), jobs=2)
+    assert [r['file'] for r in results] == [str(f) for f in files]
+    assert results[0]['unknown'] == [] and results[1]['unknown'] == ['Someone Else']
+    assert results[2]['error'] is not None
+    assert results[3]['error'].startswith('FileNotFoundError')
+    assert not (out_dir / 'missing-aanda.tex').exists()
+    expected = Authors(str(files[1]), warn_unknown=False).MNRAS(show=False)
+    assert (out_dir / 'list1-mnras.tex').read_text(encoding='utf-8') == expected + '\n'
+    assert 'Someone Else' in summary(results)
+    with pytest.raises(ValueError):
+        batch([str(files[0]), str(files[0])], ['aanda'], str(out_dir))
+
+
+def test_cache(tmp_path, monkeypatch):
+    from authors.database import load_known_authors, cache_file_for
+    monkeypatch.setenv('AUTHORS_CACHE_DIR', str(tmp_path / 'cache'))
+    file = tmp_path / 'authors.yml'
+    file.write_text('Some Author:\n  affiliations:\n  - Some institute\n', encoding='utf-8')
+    data = load_known_authors(str(file))
+    assert os.path.exists(cache_file_for(str(file)))
+    assert load_known_authors(str(file)) == data
+    file.write_text('Other Author:\n  affiliations:\n  - Some institute\n', encoding='utf-8')
+    assert list(load_known_authors(str(file))) == ['Other Author']
+
+
+def test_snapshot(database):
+    import authors
+    data = database.data
+    assert database.data is data, 'should only load the database once'
+    authors.register_author('New Author', ['New institute'])
+    assert 'New Author' in database.data
+    assert 'New Author' in get_all_known_authors()
+    with open(database.filename, 'a', encoding='utf-8') as f:
+        f.write('\nOther Author:\n  affiliations:\n  - Other institute\n')
+    assert 'Other Author' in database.data, 'should reload when the file changes'
+
+
+def test_edit(database):
+    import authors
+    with authors.edit() as db:
+        db.register_author('First Author', ['Some institute'])
+        db.update_author_email('First Author', 'first@author.com')
+        db.delete_author('Jane Doe')
+        assert 'First Author' not in database.data, 'should only write at the end'
+    assert database.data['First Author']['email'] == 'first@author.com'
+    assert 'Jane Doe' not in database.data
+
+    with pytest.raises(RuntimeError):
+        with authors.edit() as db:
+            db.delete_author('First Author')
+            raise RuntimeError
+    assert 'First Author' in database.data, 'should roll back on errors'
+
+    with pytest.raises(ValueError):
+        with authors.edit() as db:
+            db.update_author_affiliations('First Author', None, strategy='replace')
+    assert database.data['First Author']['affiliations'] == ['Some institute']
+
+
+def test_dump_known_authors(tmp_path):
+    from yaml import safe_dump
+    from authors.database import dump_known_authors
+    data = get_all_known_authors()
+    data['Jane Doe'] = {'affiliations': ['Some institute', {'Other': {'label': 'o'}}]}
+    # the layout of utils.humanize_yaml: an empty line before each top-level line
+    lines = safe_dump(data, allow_unicode=True, width=500).splitlines(keepends=True)
+    expected = ''.join(line if line.startswith(' ') else '\n' + line for line in lines)
+    new = tmp_path / 'new.yml'
+    dump_known_authors(str(new), data)
+    assert new.read_text(encoding='utf-8') == expected
+
+
+def test_sqlite(database, tmp_path):
+    import authors
+    from authors.database import use_database
+    from authors.sqlite_database import import_yaml, export_yaml
+    yaml_file = database.filename
+    sqlite_file = str(tmp_path / 'authors.sqlite')
+    import_yaml(yaml_file, sqlite_file)
+    sqlite_database = use_database(sqlite_file)
+    assert sqlite_database.data == get_all_known_authors(), 'should be lossless'
+    assert sqlite_database.backend.find('J. P. Faria') == ['João P. Faria']
+
+    with authors.edit() as db:
+        db.register_author('New Author', ['New institute', 'some'])
+        db.update_author_name('Jane Doe', 'Jane Roe')
+    data = sqlite_database.data
+    sqlite_database.reload()
+    assert sqlite_database.data == data
+    assert data['New Author']['affiliations'] == [
+        'New institute', {'Some institute': {'label': 'some'}}]
+    assert 'Jane Doe' not in data and 'Jane Roe' in data
+
+    export_yaml(sqlite_file, str(tmp_path / 'exported.yml'))
+    use_database(str(tmp_path / 'exported.yml'))
+    assert get_all_known_authors() == data
+
+
+def test_health_check(database):
+    from authors.authors import health_check_report, apply_health_check
+    import authors
+    authors.register_author('J. Doe', ['Some institutes'])
+    report = health_check_report()
+    assert report['known_authors'] == 3
+    assert report['duplicate_names'] == [
+        {'name': 'J. Doe', 'count': 2, 'authors': ['J. Doe', 'Jane Doe']}]
+    assert report['label_normalizations'] == [
+        {'affiliation': 'Some institute', 'label': 'some', 'authors': ['João P. Faria']}]
+    assert len(report['similar_affiliations']) == 1
+    pair = report['similar_affiliations'][0]
+    assert (pair['first'], pair['second']) == ('Some institute', 'Some institutes')
+    pair['keep'] = 'first'
+    apply_health_check(report)
+    assert database.data['J. Doe']['affiliations'] == ['Some institute']
+    assert database.data['João P. Faria']['affiliations'][1] == {'Some institute': {'label': 'some'}}
+
+
+def test_server(database, monkeypatch):
+    import json
+    import threading
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+    from authors import Authors
+    from authors.server import make_server
+    server = make_server('127.0.0.1', 0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+
+    def get(path, data=None):
+        request = Request(url + path, data=json.dumps(data).encode() if data else None)
+        with urlopen(request, timeout=10) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    try:
+        result = get('/render', {'authors': 'Jane Doe\nSomeone Else', 'journals': ['mnras']})
+        expected = Authors.from_list(['Jane Doe', 'Someone Else'], warn_unknown=False)
+        assert result['texts']['mnras'] == expected.MNRAS(show=False)
+        assert result['unknown'] == ['Someone Else']
+        assert get('/lookup?name=jane%20doe')['name'] == 'Jane Doe'
+        assert get('/search?q=jane%20do&k=1')['results'][0]['name'] == 'Jane Doe'
+        with pytest.raises(HTTPError) as e:
+            get('/lookup?name=New%20Author')
+        assert e.value.code == 404
+        with pytest.raises(HTTPError) as e:
+            get('/render', {'authors': ['Jane Doe'], 'journals': ['nature']})
+        assert e.value.code == 400
+        for options in ({'line_breaks': 0}, {'alphabetical': 'yes'}, {'bogus': 1}):
+            with pytest.raises(HTTPError) as e:
+                get('/render', {'authors': ['Jane Doe'], 'options': options})
+            assert e.value.code == 400
+        with open(database.filename, 'a', encoding='utf-8') as f:
+            f.write('\nNew Author:\n  affiliations:\n  - New institute\n')
+        assert get('/lookup?name=New%20Author')['name'] == 'New Author'
+        monkeypatch.setattr(Authors, 'render_all', lambda *args, **kwargs: 1 / 0)
+        with pytest.raises(HTTPError) as e:
+            get('/render', {'authors': ['Jane Doe']})
+        assert e.value.code == 500
+        assert 'ZeroDivisionError' in json.loads(e.value.read().decode('utf-8'))['error']
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,153 @@
+import pytest
+from authors.utils import lev_dist, lev_dist_many
+
+
+def test_lev_dist():
+    assert lev_dist('stamp', 'stomp') == 1
+    assert lev_dist('kitten', 'sitting') == 3
+    assert lev_dist('', 'abc') == 3
+    assert lev_dist('kitten', 'sitting', max_dist=3) == 3
+    assert lev_dist('kitten', 'sitting', max_dist=2) == 3
+    assert lev_dist('a' * 2000, 'b' * 2000, max_dist=10) == 11
+    assert lev_dist_many('stamp', ['stamp', 'stomp', 'stomps']) == [0, 1, 2]
+    assert lev_dist_many('stamp', ['stomp', 'stomps'], max_dist=1) == [1, 2]
+
+
+def test_similar_pairs():
+    import random
+    from authors.utils import similar_pairs
+    random.seed(42)
+    words = ['University', 'Institute', 'of', 'Astronomy', 'Physics', 'Geneva', 'Porto']
+    strings = [' '.join(random.choices(words, k=random.randint(1, 5))) for _ in range(60)]
+    strings = list(dict.fromkeys(strings + ['a', 'ab', 'Univ']))
+    expected = []
+    for i in range(len(strings)):
+        for j in range(i + 1, len(strings)):
+            dist = lev_dist(strings[i], strings[j])
+            prob = 1 - 2 * dist / (len(strings[i]) + len(strings[j]))
+            if prob > 0.7:
+                expected.append((i, j, dist, prob))
+    assert similar_pairs(strings, threshold=0.7) == expected
+
+
+def test_similar_pairs_random():
+    import random
+    from authors.utils import similar_pairs
+    random.seed(1)
+    strings = ['abab', 'aab']
+    for length in (5, 10, 20, 30):
+        base = [''.join(random.choices('abcdefghijklmnop ', k=length)) for _ in range(8)]
+        for s in base:
+            for _ in range(6):
+                t = list(s)
+                for _ in range(random.randint(0, length // 3)):
+                    k = random.randrange(len(t) + 1)
+                    op = random.choice('ids')
+                    if op == 'i':
+                        t.insert(k, random.choice('abcdefghijklmnop '))
+                    elif k < len(t):
+                        if op == 'd':
+                            del t[k]
+                        else:
+                            t[k] = random.choice('abcdefghijklmnop ')
+                strings.append(''.join(t))
+    strings = list(dict.fromkeys(strings))
+    dists = {(i, j): lev_dist(strings[i], strings[j])
+             for i in range(len(strings)) for j in range(i + 1, len(strings))}
+    for threshold in (0.5, 0.7, 0.9):
+        expected = []
+        for (i, j), dist in dists.items():
+            prob = 1 - 2 * dist / (len(strings[i]) + len(strings[j]))
+            if prob > threshold:
+                expected.append((i, j, dist, prob))
+        assert similar_pairs(strings, threshold=threshold) == expected
+
+
+def test_similar_pairs_workers():
+    from authors.utils import similar_pairs
+    strings = ['Institute of Astronomy', 'Institute of Astronomyy', 'Institute for Astronomy',
+               'Department of Physics', 'Departament of Physics', 'Porto']
+    expected = similar_pairs(strings)
+    assert len(expected) == 4
+    assert similar_pairs(strings, workers=2) == expected
+
+
+def test_trigram_index():
+    from authors.utils import TrigramIndex, closest_author
+    names = ['Jane Doe', 'João P. Faria', 'John Smith', 'Joana Silva']
+    index = TrigramIndex(names)
+    found = index.search('Joao Fria', 2)
+    assert found[0][0] == 'João P. Faria'
+    assert 0 < found[1][1] <= found[0][1] <= 1
+    assert index.search('xyz') == []
+    assert closest_author('Jon Smith', names) == ['John Smith']
+    assert closest_author('Jon Smith', index) == ['John Smith']
+    assert closest_author('Silva', index) == ['Joana Silva']
+
+
+def test_fuzzy_matcher():
+    from authors.utils import bitapSearch, FuzzyMatcher, search_many
+    assert bitapSearch('Joao Faria', 'Fria', 2) == ('Faria', 1)
+    assert bitapSearch('Jane Doe', 'Doe', 0) == ('Doe', 0)
+    assert bitapSearch('Jane Doe', 'xyz', 1) == ('', -1)
+    matcher = FuzzyMatcher('Jon')
+    assert matcher.search('John Smith', 3) == ('Joh', 1)
+    haystacks = ['Jane Doe', 'John Smith', 'Jon Snow']
+    assert search_many('Jon', haystacks) == [bitapSearch(h, 'Jon', len(h)) for h in haystacks]
+
+
+def test_tex():
+    from authors.utils import tex_escape, tex_escape_many, tex_deescape, tex_deescape_many
+    assert tex_escape('A&B_1 ~x') == r'A\&B\_1 \textasciitilde{}x'
+    assert tex_escape_many(['50%', '#1']) == [r'50\%', r'\#1']
+    assert tex_deescape(r"Jo\~ao F\'aria") == 'João Fária'
+    assert tex_deescape(r"{\'E}mile Fran\c{c}ois M{\o}ller") == 'Émile François Møller'
+    assert tex_deescape(r"Gro\ss e \L{}\'od\'z Mar\'{\i}a") == 'Große Łódź María'
+    assert tex_deescape_many([r'\"u', r'\v{s}']) == ['ü', 'š']
+
+
+def test_preview_cache(tmp_path, monkeypatch):
+    from authors.latex_pdf_utils import render_template, build_pdf, preview_key, preview_cache_dir
+    monkeypatch.setenv('AUTHORS_CACHE_DIR', str(tmp_path / 'cache'))
+    template = tmp_path / 'template.tex'
+    template.write_text('\\documentclass[??longauth??]{aa}\n  !!authors-institutes!!\n\\end\n',
+                        encoding='utf-8')
+    source = render_template('\\author{A}', str(template), ['longauth'])
+    assert source == '\\documentclass[longauth]{aa}\n\\author{A}\n\\end\n'
+    assert render_template('', str(template)).startswith('\\documentclass{aa}')
+    assert preview_key(source, 'aa') != preview_key(source.replace('A', 'B'), 'aa')
+    # an unchanged source returns the cached PDF without compiling
+    cached = tmp_path / 'cache' / 'previews' / f"aa-{preview_key(source, 'aa')[:32]}.pdf"
+    cached.parent.mkdir(parents=True)
+    cached.write_bytes(b'%PDF')
+    assert build_pdf(source, 'aa', str(tmp_path)) == str(cached)
+    assert preview_cache_dir() == str(cached.parent)
+
+
+def test_preview_many(tmp_path, monkeypatch):
+    from authors import latex_pdf_utils
+    monkeypatch.setenv('AUTHORS_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(latex_pdf_utils, 'TEMPLATES', str(tmp_path))
+    for journal in ('aa', 'mnras'):
+        (tmp_path / journal).mkdir()
+        (tmp_path / journal / f'{journal}-template.tex').write_text('!!authors-institutes!!\n')
+    source = latex_pdf_utils.render_template('aa text', str(tmp_path / 'aa' / 'aa-template.tex'))
+    pdf = tmp_path / 'cache' / 'previews' / f"aa-{latex_pdf_utils.preview_key(source, 'aa')[:32]}.pdf"
+    pdf.parent.mkdir(parents=True)
+    pdf.write_bytes(b'%PDF')
+    # the A&A preview is cached, the MNRAS one cannot compile
+    results = latex_pdf_utils.preview_many({'aanda': 'aa text', 'mnras': 'not LaTeX'}, timeout=30)
+    assert results['aanda'] == str(pdf)
+    assert results['mnras'] != '' and not results['mnras'].endswith('.pdf')
+    # a missing template only fails that journal
+    (tmp_path / 'mnras' / 'mnras-template.tex').unlink()
+    results = latex_pdf_utils.preview_many({'aanda': 'aa text', 'mnras': 'text'})
+    assert results['aanda'] == str(pdf)
+    assert results['mnras'].startswith('AssertionError')
+
+
+def test_continuous_preview_without_latexmk(tmp_path, monkeypatch):
+    from authors.latex_pdf_utils import LatexError, continuous_preview
+    monkeypatch.setenv('PATH', str(tmp_path))
+    with pytest.raises(LatexError):
+        continuous_preview('aa', str(tmp_path), str(tmp_path))